@@ -1,9 +1,10 @@
 from __future__ import annotations
 
 from importlib import metadata
+from typing import TYPE_CHECKING, Any
 
-from . import pipeline as _pipeline
-from .settings import Settings
+if TYPE_CHECKING:
+    from .settings import Settings
 
 # ---- version ----
 # Try to read the installed package version; fall back to the in-repo default.
@@ -26,8 +27,21 @@ def run() -> int:
         settings = Settings.load()
         pipeline.run(settings)
     """
+    from . import pipeline as _pipeline
+    from .settings import Settings
+
     settings = Settings.load()
     return _pipeline.run(settings)
 
 
+def __getattr__(name: str) -> Any:
+    # Lazy re-export: keeps `import disaster_alerts` (and `--version`/`--help`)
+    # from pulling in pydantic, requests, etc.
+    if name == "Settings":
+        from .settings import Settings
+
+        return Settings
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 __all__ = ["__version__", "Settings", "run"]
@@ -4,20 +4,21 @@ import argparse
 import json
 import os
 import sys
-from copy import deepcopy
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
 try:
     from . import __version__ as PKG_VERSION  # type: ignore
 except Exception:
     PKG_VERSION = None  # falls back to "0.0.0"
 
-from . import pipeline
-from .settings import Settings
+# pipeline/settings pull in pydantic, requests, ...; they are imported inside
+# main() after the --version/--help fast paths.
+if TYPE_CHECKING:
+    from .settings import Settings
 
 
-def _parse_args(argv: List[str]) -> argparse.Namespace:
+def _build_parser() -> argparse.ArgumentParser:
     p = argparse.ArgumentParser(
         prog="disaster-alerts",
         description="Cron-friendly alerts from NWS/USGS with yagmail notifications.",
@@ -58,47 +59,31 @@ def _parse_args(argv: List[str]) -> argparse.Namespace:
         default=False,
         help="Generate an html with geometries of events AOIs.",
     )
-    return p.parse_args(argv)
+    return p
+
+
+# Built once at import; parse_args() does not mutate the parser.
+_PARSER = _build_parser()
+
+
+def _parse_args(argv: List[str]) -> argparse.Namespace:
+    return _PARSER.parse_args(argv)
 
 
 def _redact(obj: Dict[str, Any]) -> Dict[str, Any]:
-    out = deepcopy(obj)
+    # Shallow copy; only the "email" branch is cloned because it is mutated.
+    out = dict(obj)
     email = out.get("email")
     if isinstance(email, dict) and email.get("app_password"):
-        email["app_password"] = "********"
+        out["email"] = {**email, "app_password": "********"}
     return out
 
 
 def _as_dict(settings: Settings) -> Dict[str, Any]:
-    def conv(v: Any) -> Any:
-        if isinstance(v, Path):
-            return str(v)
-        if isinstance(v, list):
-            return [conv(x) for x in v]
-        if isinstance(v, dict):
-            return {k: conv(x) for k, x in v.items()}
-        # pydantic v2 models
-        try:
-            dumped = v.model_dump()  # type: ignore[attr-defined]
-            return conv(dumped)
-        except Exception:
-            return v
-
-    # Recipients is a flexible model; strip private attrs before dumping.
-    recipients_public = {
-        k: v
-        for k, v in getattr(settings.recipients, "__dict__", {}).items()
-        if not k.startswith("_")
-    }
-
-    return {
-        "paths": conv(settings.paths),
-        "app": conv(settings.app),
-        "thresholds": conv(settings.thresholds),
-        "recipients": conv(recipients_public),
-        "email": conv(settings.email),
-        "enabled_providers": settings.enabled_providers,
-    }
+    # mode="json" yields JSON-native values directly (Path -> str, etc.).
+    data = settings.model_dump(mode="json")
+    data["enabled_providers"] = settings.enabled_providers
+    return data
 
 
 def main(argv: Optional[List[str]] = None) -> int:
@@ -109,6 +94,9 @@ def main(argv: Optional[List[str]] = None) -> int:
         print(f"disaster-alerts {ver}")
         return 0
 
+    from . import pipeline
+    from .settings import Settings
+
     # Environment overrides (allow CLI to take precedence)
     if ns.root:
         os.environ["DISASTER_ALERTS_ROOT"] = str(ns.root.expanduser())
@@ -139,7 +127,9 @@ def main(argv: Optional[List[str]] = None) -> int:
 
         real_send = email_mod.send
 
-        def _noop_send(_settings, recipients, subject, _html_body, text_body):
+        def _noop_send(
+            _settings, recipients, subject, _html_body, text_body, yag=None
+        ):
             print("[dry-run] would send to:", ", ".join(recipients))
             print("[dry-run] subject:", subject)
             preview = text_body[:200].replace("\n", " ")
@@ -4,18 +4,29 @@ Email notifications via yagmail.
 
 - One message per routing group with concise subject lines.
 - Renders both plaintext and HTML (from templates) with a tiny, safe templater.
-- Includes WKT derived from event detail JSON (NWS/USGS) when available.
+- Includes WKT from the event geometry, or from its detail JSON (NWS/USGS) when
+  the event carries none (disable via app.resolve_wkt_via_http).
 - Handles USGS eventpage URLs by converting to their *.geojson detail endpoint.
 """
 
 from __future__ import annotations
 
+import functools
+import hashlib
 import html
+import io
+import json
 import logging
+import operator
+import os
 import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Tuple
+from typing import Any, Dict, Iterable, List, TextIO, Tuple
 from zoneinfo import ZoneInfo
 
 from .providers.common import get_json
@@ -29,11 +40,14 @@ log = logging.getLogger(__name__)
 # -----------------------------------------------------------------------------
 
 
+@functools.cache
 def _templates_dir() -> Path:
     return Path(__file__).resolve().parent / "templates"
 
 
+@functools.lru_cache(maxsize=8)
 def _read_template(name: str) -> str:
+    """Read a packaged template (cached; templates ship with the package)."""
     path = _templates_dir() / name
     if not path.exists():
         if name.endswith(".html"):
@@ -44,19 +58,24 @@ def _read_template(name: str) -> str:
     return path.read_text(encoding="utf-8")
 
 
+# {{ key }} with optional inner whitespace; unknown keys are left untouched.
+_TOKEN_RE = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+
 def _render(template: str, context: Dict[str, str]) -> str:
-    out = template
-    for key, val in context.items():
-        out = out.replace(f"{{{{ {key} }}}}", val)
-        out = out.replace(f"{{{{{key}}}}}", val)  # tolerate missing space
-    return out
+    return _TOKEN_RE.sub(lambda m: context.get(m.group(1), m.group(0)), template)
 
 
 # -----------------------------------------------------------------------------
-# WKT helpers (with per-run JSON cache)
+# WKT helpers (with per-run cache + optional on-disk cache across runs)
 # -----------------------------------------------------------------------------
 
-_JSON_CACHE: Dict[str, Dict[str, Any]] = {}
+# detail URL -> resolved WKT (None when the detail JSON had no usable geometry).
+# Cleared at the start of every pipeline run so long-lived processes don't go stale.
+_WKT_CACHE: Dict[str, str | None] = {}
+
+# Detail fetches are independent and I/O-bound; resolve them concurrently.
+_WKT_FETCH_WORKERS = 8
 
 _USGS_EVENTPAGE_RE = re.compile(
     r"^https?://earthquake\.usgs\.gov/earthquakes/eventpage/([^/?#]+)"
@@ -75,12 +94,90 @@ def _normalize_detail_url(url: str) -> str:
     return url
 
 
-def _fetch_detail_json(url: str) -> Dict[str, Any]:
-    if url in _JSON_CACHE:
-        return _JSON_CACHE[url]
-    data = get_json(url)
-    _JSON_CACHE[url] = data or {}
-    return _JSON_CACHE[url]
+def _clear_wkt_cache(settings: Settings | None = None) -> None:
+    """
+    Forget memoized detail-URL lookups (called once per pipeline run).
+    With `settings`, also prune expired entries from the on-disk WKT cache.
+    """
+    _WKT_CACHE.clear()
+    if settings is not None:
+        disk = _WKTDiskCache.for_settings(settings)
+        if disk is not None:
+            disk.prune()
+
+
+class _WKTDiskCache:
+    """
+    Detail URL -> WKT persisted as one small JSON file per URL (sha1 of the URL),
+    so events that persist across cron runs don't re-fetch their detail JSON.
+    Entries older than `ttl_s` are ignored and refreshed; prune() deletes them
+    (NWS detail URLs are unique per alert, so files would otherwise pile up).
+    All I/O errors are swallowed: the cache is an optimization only.
+    """
+
+    def __init__(self, directory: Path, ttl_s: float) -> None:
+        self.directory = directory
+        self.ttl_s = ttl_s
+
+    @classmethod
+    def for_settings(cls, settings: Settings) -> "_WKTDiskCache" | None:
+        ttl_min = settings.app.wkt_cache_ttl_minutes
+        if not ttl_min or ttl_min <= 0:
+            return None
+        return cls(settings.paths.data_dir / "wkt_cache", ttl_min * 60.0)
+
+    def _path(self, url: str) -> Path:
+        return self.directory / f"{hashlib.sha1(url.encode('utf-8')).hexdigest()}.json"
+
+    def get(self, url: str) -> Tuple[bool, str | None]:
+        """Return (hit, wkt); a hit may carry None (detail had no geometry)."""
+        try:
+            entry = json.loads(self._path(url).read_text(encoding="utf-8"))
+        except Exception:
+            return False, None
+        if not isinstance(entry, dict) or entry.get("url") != url:
+            return False, None
+        fetched_at = entry.get("fetched_at")
+        if not isinstance(fetched_at, (int, float)):
+            return False, None
+        if time.time() - fetched_at > self.ttl_s:
+            return False, None
+        wkt = entry.get("wkt")
+        return True, wkt if isinstance(wkt, str) else None
+
+    def prune(self) -> None:
+        """Delete entries (and stray temp files) older than the TTL."""
+        cutoff = time.time() - self.ttl_s
+        try:
+            paths = list(self.directory.glob("*.json*"))
+        except OSError:
+            return
+        for path in paths:
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+            except OSError:
+                continue
+
+    def put(self, url: str, wkt: str | None) -> None:
+        path = self._path(url)
+        tmp = path.with_suffix(".json.tmp")
+        entry = {"url": url, "fetched_at": time.time(), "wkt": wkt}
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp.write_text(json.dumps(entry), encoding="utf-8")
+            os.replace(tmp, path)
+        except Exception as exc:
+            log.debug("WKT cache write failed for %s: %s", url, exc)
+
+
+_PAIR_FMT = "{} {}".format
+
+
+def _ring_wkt(ring: List[Any]) -> str:
+    # index access avoids the per-vertex `x, y, *_` star-unpack list; float() keeps
+    # ints rendering as "1.0" so output is identical for mixed int/float rings.
+    return ", ".join([_PAIR_FMT(float(p[0]), float(p[1])) for p in ring])
 
 
 def _to_wkt(geom: dict | None) -> str | None:
@@ -91,52 +188,88 @@ def _to_wkt(geom: dict | None) -> str | None:
     coords = geom.get("coordinates")
     try:
         if gtype == "Point" and isinstance(coords, (list, tuple)) and len(coords) >= 2:
-            x, y = float(coords[0]), float(coords[1])
-            return f"POINT ({x} {y})"
+            return f"POINT ({_PAIR_FMT(float(coords[0]), float(coords[1]))})"
         if gtype == "Polygon" and isinstance(coords, list) and coords:
-            ring = coords[0]
-            pairs = ", ".join(f"{float(x)} {float(y)}" for x, y, *_ in ring)
-            return f"POLYGON (({pairs}))"
+            return f"POLYGON (({_ring_wkt(coords[0])}))"
         if gtype == "MultiPolygon" and isinstance(coords, list) and coords:
             # keep compact: first polygon
-            poly = coords[0]
-            ring = poly[0]
-            pairs = ", ".join(f"{float(x)} {float(y)}" for x, y, *_ in ring)
-            return f"MULTIPOLYGON ((({pairs})))"
+            return f"MULTIPOLYGON ((({_ring_wkt(coords[0][0])})))"
     except Exception:
         return None
     return None
 
 
-def _wkt_for_event(event: dict) -> str | None:
-    """
-    Prefer WKT from the event's detail JSON (link/id), fall back to in-memory geometry.
-    """
+def _wkt_from_detail(url: str, disk: _WKTDiskCache | None = None) -> str | None:
+    """Fetch a detail JSON once per run and extract its geometry as WKT."""
+    if url in _WKT_CACHE:
+        return _WKT_CACHE[url]
+    if disk is not None:
+        hit, wkt = disk.get(url)
+        if hit:
+            _WKT_CACHE[url] = wkt
+            return wkt
+    try:
+        data = get_json(url) or {}
+    except Exception as exc:
+        log.debug("Detail fetch failed for %s: %s", url, exc)
+        data = {}
+
+    wkt: str | None = None
+    # Plain or Feature
+    geom = data.get("geometry")
+    if isinstance(geom, dict):
+        wkt = _to_wkt(geom)
+
+    # FeatureCollection → first feature geometry
+    if not wkt and data.get("type") == "FeatureCollection":
+        feats = data.get("features") or []
+        if feats and isinstance(feats[0], dict):
+            wkt = _to_wkt(feats[0].get("geometry"))
+
+    _WKT_CACHE[url] = wkt
+    # only persist real answers; an empty payload usually means the fetch failed
+    if disk is not None and data:
+        disk.put(url, wkt)
+    return wkt
+
+
+def _detail_url_for_event(event: dict) -> str | None:
     link = event.get("link") or event.get("id")
     if isinstance(link, str) and link.startswith("http"):
-        detail = _normalize_detail_url(link)
-        try:
-            data = _fetch_detail_json(detail)
-        except Exception as exc:
-            log.debug("Detail fetch failed for %s: %s", detail, exc)
-            data = {}
-
-        # Plain or Feature
-        geom = data.get("geometry")
-        if isinstance(geom, dict):
-            w = _to_wkt(geom)
-            if w:
-                return w
+        return _normalize_detail_url(link)
+    return None
 
-        # FeatureCollection → first feature geometry
-        if data.get("type") == "FeatureCollection":
-            feats = data.get("features") or []
-            if feats and isinstance(feats[0], dict):
-                w = _to_wkt(feats[0].get("geometry"))
-                if w:
-                    return w
 
-    return _to_wkt(event.get("geometry"))
+def _prefetch_wkts(events: Iterable[Event], disk: _WKTDiskCache | None = None) -> None:
+    """Warm the WKT cache for all unique detail URLs using a small thread pool."""
+    urls = {
+        url
+        for url in map(_detail_url_for_event, events)
+        if url and url not in _WKT_CACHE
+    }
+    if not urls:
+        return
+    if len(urls) == 1:
+        _wkt_from_detail(urls.pop(), disk)
+        return
+    with ThreadPoolExecutor(max_workers=min(_WKT_FETCH_WORKERS, len(urls))) as pool:
+        list(pool.map(lambda u: _wkt_from_detail(u, disk), urls))
+
+
+def _wkt_for_event(
+    event: dict,
+    resolve_via_http: bool = True,
+    disk: _WKTDiskCache | None = None,
+) -> str | None:
+    """
+    Prefer WKT from the event's in-memory geometry; only fall back to the detail
+    JSON (link/id) when that geometry is missing or unusable.
+    """
+    wkt = _to_wkt(event.get("geometry"))
+    if wkt or not resolve_via_http:
+        return wkt
+    url = _detail_url_for_event(event)
+    return _wkt_from_detail(url, disk) if url else None
 
 
 # -----------------------------------------------------------------------------
@@ -144,20 +277,28 @@ def _wkt_for_event(event: dict) -> str | None:
 # -----------------------------------------------------------------------------
 
 _SEV_RANK = {"extreme": 4, "severe": 3, "moderate": 2, "minor": 1, "none": 0}
+_MAX_DT = datetime.max.replace(tzinfo=timezone.utc)  # sorts missing times last
+_TEXT_SORT_KEY = operator.itemgetter(0, 1)  # (neg severity rank, time)
 
 
 def _sev_rank(severity: str | None) -> int:
-    return _SEV_RANK.get((severity or "").strip().lower(), 0)
+    """Rank an already-stripped severity string (case-insensitive)."""
+    return _SEV_RANK.get(severity.lower(), 0) if severity else 0
 
 
-def _tz(settings: Settings) -> ZoneInfo:
-    tzname = getattr(settings.app, "display_timezone", None) or "UTC"
+@functools.lru_cache(maxsize=8)
+def _zoneinfo(name: str) -> ZoneInfo:
+    """ZoneInfo by IANA name (cached: construction reads tzdata); UTC if unknown."""
     try:
-        return ZoneInfo(tzname)
+        return ZoneInfo(name)
     except Exception:
         return ZoneInfo("UTC")
 
 
+def _tz(settings: Settings) -> ZoneInfo:
+    return _zoneinfo(getattr(settings.app, "display_timezone", None) or "UTC")
+
+
 def _pick_time(props: dict, *keys: str) -> str | None:
     for key in keys:
         val = props.get(key)
@@ -166,15 +307,27 @@ def _pick_time(props: dict, *keys: str) -> str | None:
     return None
 
 
-def _to_dt(timestr: str | None) -> datetime | None:
-    if not timestr:
-        return None
+# Python 3.11+ fromisoformat parses a trailing "Z" natively.
+_FROMISOFORMAT_HANDLES_Z = sys.version_info >= (3, 11)
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_iso(timestr: str) -> datetime | None:
+    """Parse an ISO string; cached since the same onset/expires values recur."""
     try:
+        if _FROMISOFORMAT_HANDLES_Z:
+            return datetime.fromisoformat(timestr)
         return datetime.fromisoformat(timestr.replace("Z", "+00:00"))
     except Exception:
         return None
 
 
+def _to_dt(timestr: str | None) -> datetime | None:
+    if not timestr:
+        return None
+    return _parse_iso(timestr)
+
+
 def _to_dt_any(val: Any) -> datetime | None:
     """Accept ISO string or epoch-ms (int/float) → aware datetime (UTC)."""
     if val is None:
@@ -185,10 +338,7 @@ def _to_dt_any(val: Any) -> datetime | None:
         except Exception:
             return None
     if isinstance(val, str):
-        try:
-            return datetime.fromisoformat(val.replace("Z", "+00:00"))
-        except Exception:
-            return None
+        return _to_dt(val)
     return None
 
 
@@ -244,62 +394,79 @@ def _usgs_mag(ev: Event) -> float | None:
         return None
 
 
+def _dedup_key(event: Event) -> Tuple:
+    props = event.get("properties") or {}
+    if _is_usgs(event):
+        origin = _to_dt_any(props.get("time"))
+        updated = _to_dt_any(props.get("updated"))
+        return (event.get("title") or "", origin or "", updated or "")
+    onset = _to_dt(_pick_time(props, "onset", "effective", "sent"))
+    expires = _to_dt(_pick_time(props, "expires", "ends"))
+    office = props.get("senderName") or ""
+    return (
+        event.get("title") or props.get("event") or "",
+        office,
+        onset or "",
+        expires or "",
+    )
+
+
+def _dedup_events(events: Iterable[Event]) -> List[Event]:
+    """Collapse events sharing a _dedup_key (last one wins, first position kept)."""
+    uniq: Dict[Tuple, Event] = {}
+    for ev in events:
+        uniq[_dedup_key(ev)] = ev
+    return list(uniq.values())
+
+
 # -----------------------------------------------------------------------------
 # plaintext builder
 # -----------------------------------------------------------------------------
 
 
-def _format_text_lines(events: Iterable[Event], settings: Settings) -> List[str]:
-    """Render plaintext rows (NWS/USGS-aware, deduped + sorted)."""
-
-    def key_tuple(event: Event) -> Tuple:
-        props = event.get("properties") or {}
-        if _is_usgs(event):
-            origin = _to_dt_any(props.get("time"))
-            updated = _to_dt_any(props.get("updated"))
-            return (event.get("title") or "", origin or "", updated or "")
-        else:
-            onset = _to_dt(_pick_time(props, "onset", "effective", "sent"))
-            expires = _to_dt(_pick_time(props, "expires", "ends"))
-            office = props.get("senderName") or ""
-            return (
-                event.get("title") or props.get("event") or "",
-                office,
-                onset or "",
-                expires or "",
-            )
+def _format_text_lines(
+    events: Iterable[Event],
+    wkts: Dict[int, str | None],
+    tz: ZoneInfo,
+    now_local: datetime,
+) -> List[str]:
+    """
+    Render plaintext rows (NWS/USGS-aware, sorted). Events arrive already deduped;
+    `wkts` maps id(event) -> WKT and `now_local` is the reference time for
+    "time left", both computed once in _build_bodies.
+    """
 
-    # dedupe
-    uniq: Dict[Tuple, Event] = {}
+    # single pass: parse sort keys and row times once per event
+    # (neg severity rank, sort time, is_usgs, start, end, severity, props, event)
+    # USGS: start/end = origin/updated, sorted by origin asc
+    # NWS:  start/end = onset/expires, sorted by expires asc
+    prepared = []
     for ev in events:
-        uniq[key_tuple(ev)] = ev
-    events_dedup = list(uniq.values())
-
-    # sort: severity desc; USGS by origin asc, NWS by expires asc
-    events_dedup.sort(
-        key=lambda ev: (
-            -_sev_rank(str(ev.get("severity"))),
-            (
-                _to_dt_any((ev.get("properties") or {}).get("time"))
-                if _is_usgs(ev)
-                else _to_dt(_pick_time((ev.get("properties") or {}), "expires", "ends"))
-            )
-            or datetime.max.replace(tzinfo=timezone.utc),
+        props = ev.get("properties") or {}
+        usgs = _is_usgs(ev)
+        if usgs:
+            start = _to_dt_any(props.get("time"))
+            end = _to_dt_any(props.get("updated"))
+            sort_dt = start
+        else:
+            start = _to_dt(_pick_time(props, "onset", "effective", "sent"))
+            end = _to_dt(_pick_time(props, "expires", "ends"))
+            sort_dt = end
+        sev = str(ev.get("severity") or "").strip()
+        prepared.append(
+            (-_sev_rank(sev), sort_dt or _MAX_DT, usgs, start, end, sev, props, ev)
         )
-    )
 
-    tz = _tz(settings)
-    now_local = datetime.now(timezone.utc).astimezone(tz)
+    # sort: severity desc, then time asc (stable for ties)
+    prepared.sort(key=_TEXT_SORT_KEY)
 
     out: List[str] = []
-    for idx, ev in enumerate(events_dedup, 1):
-        props = ev.get("properties") or {}
+    for idx, (_, _, usgs, start, end, sev, props, ev) in enumerate(prepared, 1):
         link = str(ev.get("link") or ev.get("id") or "").strip()
         title = str(props.get("event") or ev.get("title") or "(untitled)")
 
-        if _is_usgs(ev):
-            origin = _to_dt_any(props.get("time"))
-            updated = _to_dt_any(props.get("updated"))
+        if usgs:
+            origin, updated = start, end
             mag = _usgs_mag(ev)
             depth_km = _usgs_depth_km(ev)
             alert = (props.get("alert") or "—").title()
@@ -319,9 +486,8 @@ def _format_text_lines(events: Iterable[Event], settings: Settings) -> List[str]
         else:
             office = str(props.get("senderName") or "").strip()
             area = str(props.get("areaDesc") or "").strip()
-            onset = _to_dt(_pick_time(props, "onset", "effective", "sent"))
-            expires = _to_dt(_pick_time(props, "expires", "ends"))
-            sev = (str(ev.get("severity") or "").strip()) or "—"
+            onset, expires = start, end
+            sev = sev or "—"
             cert = (str(props.get("certainty") or "").strip()) or "—"
             urg = (str(props.get("urgency") or "").strip()) or "—"
 
@@ -336,12 +502,13 @@ def _format_text_lines(events: Iterable[Event], settings: Settings) -> List[str]
                 row.append(f"   {meta}")
             row.extend([f"   {when}", f"   {sevline}", f"   {url}"])
 
-        wkt = _wkt_for_event(ev)
+        wkt = wkts.get(id(ev))
         if wkt:
             trimmed = (wkt[:600] + "…") if len(wkt) > 600 else wkt
             row.append(f"   WKT: {trimmed}")
 
-        out.append("\n".join(row))
+        # flat list of lines; _build_bodies joins everything in one pass
+        out.extend(row)
         out.append("")  # spacer line between events
 
     return out
@@ -352,9 +519,14 @@ def _format_text_lines(events: Iterable[Event], settings: Settings) -> List[str]
 # -----------------------------------------------------------------------------
 
 
-def _format_html_rows(events: Iterable[Event]) -> str:
-    """HTML table rows; add a detail row for USGS (origin/mag/depth/alert/tsunami) and WKT row."""
-    rows: List[str] = []
+def _write_html_rows(
+    events: Iterable[Event], wkts: Dict[int, str | None], out: TextIO
+) -> None:
+    """
+    Write HTML table rows into `out` (one per line); add a detail row for USGS
+    (origin/mag/depth/alert/tsunami) and a WKT row.
+    """
+    write = out.write
     for ev in events:
         title = html.escape(str(ev.get("title") or "").strip() or "(untitled)")
         provider = html.escape(str(ev.get("provider") or "unknown").upper())
@@ -366,7 +538,7 @@ def _format_html_rows(events: Iterable[Event]) -> str:
         sev_cell = severity or "&nbsp;"
         upd_cell = updated or "&nbsp;"
 
-        rows.append(
+        write(
             "<tr>"
             f"<td>{provider}</td>"
             f"<td>{title}</td>"
@@ -374,7 +546,7 @@ def _format_html_rows(events: Iterable[Event]) -> str:
             f"<td>{upd_cell}</td>"
             f"<td>{link_html}</td>"
             f"<td><code>{eid}</code></td>"
-            "</tr>"
+            "</tr>\n"
         )
 
         if _is_usgs(ev):
@@ -398,23 +570,22 @@ def _format_html_rows(events: Iterable[Event]) -> str:
             detail_parts.append(f"Alert: {html.escape(alert)}")
             detail_parts.append(f"Tsunami: {tsunami}")
 
-            rows.append(
+            write(
                 "<tr><td colspan='6' style='font-family:system-ui,Segoe UI,Arial;font-size:12px;'>"
                 + " • ".join(detail_parts)
-                + "</td></tr>"
+                + "</td></tr>\n"
             )
 
-        wkt = _wkt_for_event(ev)
+        wkt = wkts.get(id(ev))
         if wkt:
             trimmed = (wkt[:600] + "…") if len(wkt) > 600 else wkt
-            rows.append(
+            write(
                 "<tr>"
                 "<td colspan='6' style='font-family:monospace;font-size:12px;white-space:nowrap;overflow:auto;'>"
                 f"<strong>WKT:</strong> {html.escape(trimmed)}"
                 "</td>"
-                "</tr>"
+                "</tr>\n"
             )
-    return "\n".join(rows)
 
 
 # -----------------------------------------------------------------------------
@@ -426,42 +597,66 @@ def _now_utc_iso() -> str:
     return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
 
 
+_SUBJECT_PREFIX = "[disaster-alerts] "
+_COUNT_KEY = operator.itemgetter(1)
+_join_types = ", ".join
+
+
 def _subject_for_group(group_key: str, events: List[Event]) -> str:
     """Compose concise subject summarizing alert types and counts."""
-    from collections import Counter
-
-    titles: List[str] = []
+    counts: Dict[str, int] = {}
     for ev in events:
         props = ev.get("properties") or {}
-        t = str(props.get("event") or ev.get("title") or "")
-        titles.append(t.split(" issued", 1)[0])
-    counts = Counter(titles)
-    types = ", ".join(f"{k} ×{v}" for k, v in counts.most_common())
+        t = str(props.get("event") or ev.get("title") or "").split(" issued", 1)[0]
+        counts[t] = counts.get(t, 0) + 1
+    # count desc; ties keep first-seen order (stable sort, like most_common)
+    ranked = sorted(counts.items(), key=_COUNT_KEY, reverse=True)
+    types = _join_types([f"{k} ×{v}" for k, v in ranked])
     total = len(events)
     plural = "" if total == 1 else "s"
-    return f"[disaster-alerts] {total} new event{plural} — {types}  ({group_key})"
+    return f"{_SUBJECT_PREFIX}{total} new event{plural} — {types}  ({group_key})"
+
+
+_HTML_TABLE_HEAD = (
+    "<table border='1' cellpadding='6' cellspacing='0' "
+    "style='border-collapse:collapse;'>"
+    "<thead><tr>"
+    "<th>Provider</th><th>Title</th><th>Severity</th>"
+    "<th>Updated</th><th>Link</th><th>ID</th>"
+    "</tr></thead>"
+    "<tbody>\n"
+)
+_HTML_TABLE_TAIL = "</tbody></table>"
 
 
 def _build_bodies(
     subject: str, events: List[Event], settings: Settings
 ) -> Tuple[str, str]:
     """Return (html_body, text_body) before templating."""
+    # dedupe once so neither formatter (nor the WKT fetches) sees duplicates
+    events = _dedup_events(events)
+    # resolve each event's WKT once; both formatters share the result.
+    # Only events without usable in-memory geometry need a detail fetch.
+    wkts = {id(ev): _to_wkt(ev.get("geometry")) for ev in events}
+    if settings.app.resolve_wkt_via_http:
+        pending = [ev for ev in events if not wkts[id(ev)]]
+        disk = _WKTDiskCache.for_settings(settings)
+        _prefetch_wkts(pending, disk)
+        for ev in pending:
+            wkts[id(ev)] = _wkt_for_event(ev, disk=disk)
+
     # plaintext
-    lines = _format_text_lines(events, settings)
+    tz = _tz(settings)
+    now_local = datetime.now(timezone.utc).astimezone(tz)
+    lines = _format_text_lines(events, wkts, tz, now_local)
     text_body = "\n".join(lines)
 
-    # html table
-    rows_html = _format_html_rows(events)
-    table = (
-        "<table border='1' cellpadding='6' cellspacing='0' style='border-collapse:collapse;'>"
-        "<thead><tr>"
-        "<th>Provider</th><th>Title</th><th>Severity</th><th>Updated</th><th>Link</th><th>ID</th>"
-        "</tr></thead>"
-        f"<tbody>{rows_html}</tbody>"
-        "</table>"
-    )
-    html_body = table
-    return html_body, text_body
+    # html table, streamed into one buffer (no separate rows string to copy)
+    buf = io.StringIO()
+    buf.write(_HTML_TABLE_HEAD)
+    _write_html_rows(events, wkts, buf)
+    buf.write(_HTML_TABLE_TAIL)
+    return buf.getvalue(), text_body
 
 
 # -----------------------------------------------------------------------------
@@ -503,14 +698,8 @@ def build_message(
     return subject, html_body, text_body
 
 
-def send(
-    settings: Settings,
-    recipients: List[str],
-    subject: str,
-    html_body: str,
-    text_body: str,
-) -> None:
-    """Send the message with yagmail. Raises on failure."""
+def _open_smtp(settings: Settings) -> Any:
+    """Open an authenticated yagmail SMTP connection. Raises on failure."""
     try:
         import yagmail
     except ImportError as exc:
@@ -520,13 +709,70 @@ def send(
         ) from exc
 
     settings.require_email()
-    user = settings.email.user
-    app_password = settings.email.app_password
+    log.debug("Connecting to SMTP as %s", settings.email.user)
+    return yagmail.SMTP(settings.email.user, settings.email.app_password)
+
+
+class _SMTPSession:
+    """
+    One SMTP connection shared by several sends.
+    Connects lazily on the first send, so no-op senders never touch SMTP.
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        self._settings = settings
+        self._stack = ExitStack()
+        self._yag: Any = None
+
+    def send(self, **kwargs: Any) -> None:
+        if self._yag is None:
+            self._yag = self._stack.enter_context(_open_smtp(self._settings))
+        self._yag.send(**kwargs)
+
+    def close(self) -> None:
+        self._stack.close()
+        self._yag = None
+
+    def __enter__(self) -> "_SMTPSession":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
 
-    log.debug("Connecting to SMTP as %s to send to %s", user, ", ".join(recipients))
-    with yagmail.SMTP(user, app_password) as yag:
-        yag.send(to=recipients, subject=subject, contents=[text_body, html_body])
+
+def send(
+    settings: Settings,
+    recipients: List[str],
+    subject: str,
+    html_body: str,
+    text_body: str,
+    yag: Any = None,
+) -> None:
+    """
+    Send the message with yagmail. Raises on failure.
+    Pass an open connection as `yag` (see send_many) to skip the per-call
+    TLS handshake + AUTH; otherwise a connection is opened for this message.
+    """
+    contents = [text_body, html_body]
+    if yag is not None:
+        yag.send(to=recipients, subject=subject, contents=contents)
+    else:
+        with _open_smtp(settings) as conn:
+            conn.send(to=recipients, subject=subject, contents=contents)
 
     log.info(
         "Email sent to %d recipient(s): %s", len(recipients), ", ".join(recipients)
     )
+
+
+def send_many(
+    settings: Settings, messages: Iterable[Tuple[List[str], str, str, str]]
+) -> None:
+    """
+    Send several (recipients, subject, html_body, text_body) messages over a
+    single SMTP connection. Dispatches through the module-level `send`, so
+    swapping `send` (e.g. --dry-run) still applies.
+    """
+    with _SMTPSession(settings) as session:
+        for recipients, subject, html_body, text_body in messages:
+            send(settings, recipients, subject, html_body, text_body, yag=session)
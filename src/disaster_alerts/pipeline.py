@@ -2,10 +2,9 @@ from __future__ import annotations
 
 import logging
 from collections import defaultdict
-from typing import Any, Dict, Iterable, List, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Tuple
 
 from . import email as _email
-from . import plot_html_map as _plot_html_map
 from . import rules as _rules
 from .providers import fetch_from_enabled as _fetch_from_enabled
 from .settings import Settings, Thresholds
@@ -27,10 +26,21 @@ def _setup_logging(level: str) -> None:
 
 # ------------------------ fetch ------------------------
 
+# Immutable defaults for keys read downstream (email/map/state); "properties"
+# is filled separately because it needs a fresh dict.
+_EVENT_DEFAULTS: Dict[str, Any] = {
+    "routing_key": "default",
+    "updated": None,
+    "title": "",
+    "severity": None,
+    "link": None,
+}
+
 
 def _collect_events(settings: Settings) -> List[Event]:
     events = _fetch_from_enabled(settings)
     # Normalize required/expected keys defensively
+    defaults = _EVENT_DEFAULTS.items()
     out: List[Event] = []
     for i, e in enumerate(events):
         if not isinstance(e, dict):
@@ -38,12 +48,11 @@ def _collect_events(settings: Settings) -> List[Event]:
             continue
         if "id" not in e or "provider" not in e:
             raise RuntimeError(f"Event #{i} missing required keys 'id'/'provider'")
-        e.setdefault("routing_key", "default")
-        e.setdefault("updated", None)
-        e.setdefault("title", "")
-        e.setdefault("severity", None)
-        e.setdefault("link", None)
-        e.setdefault("properties", {})
+        for k, v in defaults:
+            if k not in e:
+                e[k] = v
+        if "properties" not in e:
+            e["properties"] = {}  # fresh dict per event; never share a default
         out.append(e)
     log.info(
         "Fetched total %d event(s) from %d provider(s)",
@@ -72,107 +81,72 @@ def _only_new(events: List[Event], state: _State) -> List[Event]:
 # ------------------------ routing & email ------------------------
 
 
-def _group_by_routing_key(
-    events: Iterable[Event], settings: Settings
-) -> Dict[str, List[Event]]:
-    """
-    Group events by routing key, applying routing rules:
-      - force_group: override all events (if meaningful)
-      - drop_groups: skip events in listed groups
-      - merge: remap source->target groups
-    """
+KeyFn = Callable[[Event], str]
 
-    cfg = settings.app.routing
-    drop_groups = set(cfg.drop_groups or [])
-    merge_map = cfg.merge or {}
-    force_group = cfg.force_group.strip() if cfg.force_group else None
-    groups: Dict[str, List[Event]] = defaultdict(list)
 
-    for e in events:
-        raw_key = e.get("routing_key")
-
-        # -----------------------------
-        # Determine base key
-        # -----------------------------
-        if force_group and force_group.lower() != "default":
-            key = force_group
-        elif isinstance(raw_key, str) and raw_key.strip():
-            key = raw_key.strip()
-        else:
-            key = "default"
-
-        # -----------------------------
-        # Skip dropped groups
-        # -----------------------------
-        if key in drop_groups:
-            continue
-
-        # -----------------------------
-        # Apply merge rules (only if not forced)
-        # -----------------------------
-        if not (force_group and force_group.lower() != "default"):
-            key = merge_map.get(key, key)
+def _routing_key_of(e: Event) -> str:
+    raw_key = e.get("routing_key")
+    return raw_key.strip() if isinstance(raw_key, str) else ""
 
-        # -----------------------------
-        # Append to group
-        # -----------------------------
-        groups[key].append(e)
 
-    return groups
+def _event_type_of(e: Event) -> str:
+    props = e.get("properties")
+    raw_event = props.get("event") if isinstance(props, dict) else None
+    return raw_event.strip() if isinstance(raw_event, str) else ""
 
 
-def _group_by_event_type(
-    events: Iterable[Event], settings: Settings
-) -> Dict[str, List[Event]]:
+def _group_multi(
+    events: Iterable[Event], settings: Settings, key_fns: Dict[str, KeyFn]
+) -> Dict[str, Dict[str, List[Event]]]:
     """
-    Group events by e['properties']['event'], applying routing rules:
+    Group events under several key functions in a single pass, applying
+    routing rules to each grouping:
       - force_group: override all events (if meaningful)
       - drop_groups: skip events in listed groups
       - merge: remap source->target groups
+    Empty keys fall back to "default". Returns {name: groups} per key_fns.
     """
+    forced, drop_groups, merge_map = settings.app.routing.ctx
 
-    cfg = settings.app.routing
-    drop_groups = set(cfg.drop_groups or [])
-    merge_map = cfg.merge or {}
-    force_group = cfg.force_group.strip() if cfg.force_group else None
-    groups: Dict[str, List[Event]] = defaultdict(list)
+    # Forced routing: every event lands in one group (or none if it's dropped).
+    if forced:
+        evs = [] if forced in drop_groups else list(events)
+        return {name: ({forced: list(evs)} if evs else {}) for name in key_fns}
+
+    outs: Dict[str, Dict[str, List[Event]]] = {
+        name: defaultdict(list) for name in key_fns
+    }
+    targets = [(key_fn, outs[name]) for name, key_fn in key_fns.items()]
 
     for e in events:
-        # -----------------------------
-        # Extract event type from properties
-        # -----------------------------
-        raw_event = None
-        if "properties" in e and isinstance(e["properties"], dict):
-            raw_event = e["properties"].get("event")
-
-        # -----------------------------
-        # Determine base key
-        # -----------------------------
-        if force_group and force_group.lower() != "default":
-            key = force_group
-        elif isinstance(raw_event, str) and raw_event.strip():
-            key = raw_event.strip()
-        else:
-            key = "default"
-
-        # -----------------------------
-        # Skip dropped groups
-        # -----------------------------
-        if key in drop_groups:
-            continue
+        for key_fn, groups in targets:
+            key = key_fn(e) or "default"
+            if key in drop_groups:
+                continue
+            groups[merge_map.get(key, key)].append(e)
+
+    return outs
+
 
-        # -----------------------------
-        # Apply merge rules (only if not forced)
-        # -----------------------------
-        if not (force_group and force_group.lower() != "default"):
-            key = merge_map.get(key, key)
+def _group_by(
+    events: Iterable[Event], settings: Settings, key_fn: KeyFn
+) -> Dict[str, List[Event]]:
+    """Group events by ``key_fn`` under the routing rules (see _group_multi)."""
+    return _group_multi(events, settings, {"groups": key_fn})["groups"]
+
+
+def _group_by_routing_key(
+    events: Iterable[Event], settings: Settings
+) -> Dict[str, List[Event]]:
+    """Group events by routing key, applying routing rules."""
+    return _group_by(events, settings, _routing_key_of)
 
-        # -----------------------------
-        # Append to group
-        # -----------------------------
-        groups[key].append(e)
 
-    return groups
+def _group_by_event_type(
+    events: Iterable[Event], settings: Settings
+) -> Dict[str, List[Event]]:
+    """Group events by e['properties']['event'], applying routing rules."""
+    return _group_by(events, settings, _event_type_of)
 
 
 def _recipients_for_key(settings: Settings, key: str) -> List[str]:
@@ -189,15 +163,12 @@ def _dispatch_emails(
     settings: Settings, grouped: Dict[str, List[Event]]
 ) -> Tuple[int, int, List[Event]]:
     """
-    Send one email per group (routing key).
+    Send one email per group (routing key) over a single SMTP connection.
     Returns (groups_sent, events_notified, sent_events_flat_list).
     """
     settings.require_email()
 
-    groups_sent = 0
-    events_notified = 0
-    sent_events: List[Event] = []
-
+    outbox: List[Tuple[str, List[str], List[Event], Tuple[str, str, str]]] = []
     for key, evs in grouped.items():
         if not evs:
             continue
@@ -205,10 +176,20 @@ def _dispatch_emails(
         if not recipients:
             log.warning("No recipients configured for routing key '%s'. Skipping.", key)
             continue
+        outbox.append((key, recipients, evs, _email.build_message(settings, evs, key)))
+
+    _email.send_many(
+        settings,
+        [
+            (recipients, subject, html_body, text_body)
+            for _, recipients, _, (subject, html_body, text_body) in outbox
+        ],
+    )
 
-        subject, html_body, text_body = _email.build_message(settings, evs, key)
-        _email.send(settings, recipients, subject, html_body, text_body)
-
+    groups_sent = 0
+    events_notified = 0
+    sent_events: List[Event] = []
+    for key, recipients, evs, _ in outbox:
         groups_sent += 1
         events_notified += len(evs)
         sent_events.extend(evs)
@@ -240,6 +221,7 @@ def run(settings: Settings) -> int:
       6) persist state with events that were actually emailed
     """
     _setup_logging(settings.app.log_level)
+    _email._clear_wkt_cache(settings)
 
     # 1) fetch
     events = _collect_events(settings)
@@ -255,6 +237,9 @@ def run(settings: Settings) -> int:
 
     # 3) generate html map of events if enabled
     if not (settings.app.no_html):
+        # Map support (and its geo deps) is only loaded when a map is wanted.
+        from . import plot_html_map as _plot_html_map
+
         try:
             events = _plot_html_map._add_aoi_to_events(events, settings.paths.data_dir)
             grouped_for_map = _group_by_event_type(events, settings)
@@ -263,6 +248,7 @@ def run(settings: Settings) -> int:
             )
         except Exception as e:
             log.error("Failed to generate events HTML map: %s", e)
+        return 0  # map mode sends no emails
     else:
         # 3) dedup (do not update state yet—only after successful sends)
         state = _State.load(settings.paths.state_file)
@@ -289,8 +275,9 @@ def run(settings: Settings) -> int:
 
         # 6) persist state (only for events we actually attempted to send)
         if sent_events:
-            state.update_with(sent_events)
-            state.save()
+            state.append_events(sent_events)
+        # Fold the log into state.json so the snapshot is current between runs
+        state.compact()
 
         log.info(
             "Pipeline completed: %d group(s) emailed, %d event(s) notified.",
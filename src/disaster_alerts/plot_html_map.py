@@ -7,17 +7,18 @@ Plot interactive HTML map for the activated events.
 from __future__ import annotations
 
 import colorsys
+import functools
 import hashlib
+import html
 import ipaddress
-import json
 import logging
 import socket
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, Iterable, List
+from typing import Any, Callable, Dict, Iterable, List
 from urllib.parse import urlparse
 
-import requests
-
+from .providers.common import _SESSION, _json_loads, user_agent
 from .settings import Settings
 
 # -----------------------------------------------------------------------------
@@ -41,6 +42,13 @@ TRUSTED_URL_SUFFIXES = (
     "usgs.gov",
 )
 MAX_GEOJSON_BYTES = 2 * 1024 * 1024  # 2 MiB
+AOI_FETCH_WORKERS = 16
+
+# Popup line templates, bound once (empty fields are left out of the popup).
+_POPUP_PROVIDER = "<b>Provider:</b> {}".format
+_POPUP_SEVERITY = "<b>Severity:</b> {}".format
+_POPUP_DESCRIPTION = "<b>Description:</b> {}".format
+_POPUP_SEP = "<br>"
 
 
 def _is_url(s: str) -> bool:
@@ -105,7 +113,9 @@ def _detect_family(event_type: str) -> str:
     return "storm"
 
 
+@functools.lru_cache(maxsize=256)
 def _color_from_event_type(event_type: str) -> str:
+    """Stable color for an event type (a pure function of the name)."""
     family = _detect_family(event_type)
     base_hue = FAMILY_HUES[family]
 
@@ -133,6 +143,21 @@ def _color_from_event_type(event_type: str) -> str:
     )
 
 
+def _highlight_style(_feature: Any) -> Dict[str, Any]:
+    return {"weight": 3, "fillOpacity": 0.6}
+
+
+@functools.lru_cache(maxsize=None)
+def _style_for_color(color: str) -> Callable[[Any], Dict[str, Any]]:
+    """One shared folium style_function per color (instead of one per shape)."""
+    style = {"color": color, "weight": 2, "fillColor": color, "fillOpacity": 0.35}
+
+    def style_function(_feature: Any) -> Dict[str, Any]:
+        return dict(style)
+
+    return style_function
+
+
 def _generate_events_html_map(
     settings: "Settings",
     events: dict[str, list["Event"]],
@@ -145,10 +170,9 @@ def _generate_events_html_map(
 
     import folium
     from branca.element import MacroElement
-    from folium.features import GeoJson
+    from folium.features import GeoJson, GeoJsonPopup
     from folium.plugins import Draw
     from jinja2 import Template
-    from shapely.geometry import MultiPolygon
 
     class MapDashboardJS(MacroElement):
         def __init__(self):
@@ -549,6 +573,7 @@ def _generate_events_html_map(
             )
 
     output_file = file_dir / "activated_events_map.html"
+    escape = html.escape
 
     US_CENTER = [39.8283, -98.5795]
     map_object = folium.Map(location=US_CENTER, zoom_start=5, tiles=None)
@@ -566,38 +591,42 @@ def _generate_events_html_map(
         )
         legend_label = f"{color_box}{event_type} ({len(group_events)})"
         feature_group = folium.FeatureGroup(name=legend_label, show=True)
+        style_function = _style_for_color(color)
 
+        # One GeoJson layer (FeatureCollection) per group rather than one per
+        # shape: far fewer Leaflet layers / JS blocks in the saved HTML.
+        features: List[Dict[str, Any]] = []
         for e in group_events:
             geom = e.get("aoi_polygon")
             if geom is None:
                 log.debug("Event %s has no AOI geometry", e.get("id"))
                 continue
-            provider = str(e.get("provider", "")).upper()
-            popup_html = "<br>".join(
-                f"<b>{label}:</b> {value}"
-                for label, value in [
-                    ("Provider", provider),
-                    ("Severity", e.get("severity")),
-                    ("Description", e.get("title")),
-                ]
-                if value
+            # Values are escaped: titles routinely contain quotes/apostrophes.
+            parts: List[str] = []
+            provider = e.get("provider")
+            if provider:
+                parts.append(_POPUP_PROVIDER(escape(str(provider).upper())))
+            severity = e.get("severity")
+            if severity:
+                parts.append(_POPUP_SEVERITY(escape(str(severity))))
+            title = e.get("title")
+            if title:
+                parts.append(_POPUP_DESCRIPTION(escape(str(title))))
+            popup_html = _POPUP_SEP.join(parts)
+            features.append(
+                {
+                    "type": "Feature",
+                    "geometry": e.get("aoi_geojson") or geom.__geo_interface__,
+                    "properties": {"popup": popup_html},
+                }
             )
-            if isinstance(geom, MultiPolygon):
-                geometries = geom.geoms
-            else:
-                geometries = [geom]
-            for g in geometries:
-                GeoJson(
-                    data=g.__geo_interface__,
-                    style_function=lambda _, c=color: {
-                        "color": c,
-                        "weight": 2,
-                        "fillColor": c,
-                        "fillOpacity": 0.35,
-                    },
-                    highlight_function=lambda _: {"weight": 3, "fillOpacity": 0.6},
-                    popup=folium.Popup(popup_html, max_width=350),
-                ).add_to(feature_group)
+        if features:
+            GeoJson(
+                data={"type": "FeatureCollection", "features": features},
+                style_function=style_function,
+                highlight_function=_highlight_style,
+                popup=GeoJsonPopup(fields=["popup"], labels=False, max_width=350),
+            ).add_to(feature_group)
         feature_group.add_to(map_object)
 
     # Add Layer controls
@@ -623,32 +652,42 @@ def _generate_events_html_map(
     log.info("Event map written to %s", output_file)
 
 
+def _aoi_download_path(url: str, timestamp_dir: str | Path) -> Path:
+    """Per-URL download path, so cached/parallel downloads never collide."""
+    digest = hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
+    return Path(timestamp_dir) / f"AOI_from_url_{digest}.geojson"
+
+
+@functools.lru_cache(maxsize=1024)
+def _link_to_geometry(link: str, timestamp_dir: str):
+    """
+    Resolve a WKT string or remote GeoJSON link to a geometry (memoized per
+    process; many NWS alerts share the same affected zone URL).
+    """
+    from shapely import wkt
+
+    if link.upper().startswith(("POINT", "POLYGON")):
+        geometry = wkt.loads(link)
+    elif _is_url(link):
+        bbox_path = _download_url_to_file(link, _aoi_download_path(link, timestamp_dir))
+        geometry = _geometry_from_file(bbox_path)
+    else:
+        raise ValueError("Local file paths are not allowed for event AOI sources")
+    return geometry, geometry.bounds, geometry.centroid
+
+
 def _bbox_to_geometry(bbox, timestamp_dir):
-    from shapely import Point, wkt
+    from shapely import Point
     from shapely.geometry import box
 
     if isinstance(bbox, str):
-        bbox_clean = bbox.strip()
-        bbox_upper = bbox_clean.upper()
-        if bbox_upper.startswith(("POINT", "POLYGON")):
-            geometry = wkt.loads(bbox_clean)
-        else:
-            # if URL, download
-            if _is_url(bbox_clean):
-                filename = "AOI_from_url.geojson"
-                file_path = Path(timestamp_dir) / filename
-                bbox_path = _download_url_to_file(bbox_clean, file_path)
-            else:
-                raise ValueError(
-                    "Local file paths are not allowed for event AOI sources"
-                )
-            geometry = _geometry_from_file(bbox_path)
+        return _link_to_geometry(bbox.strip(), str(timestamp_dir))
+
+    lat_min, lat_max, lon_min, lon_max = bbox
+    if lat_min == lat_max and lon_min == lon_max:
+        geometry = Point(lon_min, lat_min)
     else:
-        lat_min, lat_max, lon_min, lon_max = bbox
-        if lat_min == lat_max and lon_min == lon_max:
-            geometry = Point(lon_min, lat_min)
-        else:
-            geometry = box(lon_min, lat_min, lon_max, lat_max)
+        geometry = box(lon_min, lat_min, lon_max, lat_max)
 
     return geometry, geometry.bounds, geometry.centroid
 
@@ -663,8 +702,10 @@ def _add_aoi_to_events(
       - event["aoi_polygon"]
       - event["aoi"]
       - event["centroid"]
+      - event["aoi_geojson"]  (GeoJSON mapping of aoi_polygon)
     """
-    out: List[Event] = []
+    events = list(events)
+    links: List[str] = []
     for e in events:
         props = e.get("properties")
         if not isinstance(props, dict):
@@ -678,19 +719,46 @@ def _add_aoi_to_events(
         elif "storm" in event_lower:
             affected_zones = props.get("affectedZones", [])
             link = str(affected_zones[0]) if affected_zones else ""
+        links.append(link)
+
+    # Resolve each distinct link once; downloads are I/O bound, so run them
+    # concurrently and keep per-link errors for the logging pass below.
+    def _resolve(link: str):
+        try:
+            return _bbox_to_geometry(link, file_dir), None
+        except Exception as exc:
+            return None, exc
+
+    unique = list(dict.fromkeys(link for link in links if link))
+    if len(unique) > 1:
+        workers = min(AOI_FETCH_WORKERS, len(unique))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            resolved = dict(zip(unique, pool.map(_resolve, unique)))
+    else:
+        resolved = {link: _resolve(link) for link in unique}
+
+    geojson_by_link: Dict[str, Any] = {}
+    out: List[Event] = []
+    for e, link in zip(events, links):
         if not link:
             log.debug("Event %s has no link; skipping AOI", e.get("id"))
             out.append(e)
             continue
 
-        try:
-            aoi_polygon, aoi, centroid = _bbox_to_geometry(link, file_dir)
+        result, exc = resolved[link]
+        if exc is None:
+            aoi_polygon, aoi, centroid = result
+
+            # GeoJSON mapping of the AOI, converted once per distinct link and
+            # reused by map rendering.
+            if link not in geojson_by_link:
+                geojson_by_link[link] = getattr(aoi_polygon, "__geo_interface__", None)
 
             e["aoi_polygon"] = aoi_polygon
             e["aoi"] = aoi
             e["centroid"] = centroid
-
-        except Exception as exc:
+            e["aoi_geojson"] = geojson_by_link[link]
+        else:
             log.warning(
                 "Failed to build AOI for event %s (link=%r): %s",
                 e.get("id"),
@@ -717,31 +785,56 @@ def _download_url_to_file(
 
     _validate_remote_url(url)
 
-    response = requests.get(url, timeout=timeout, stream=True)
+    response = _SESSION.get(
+        url, headers={"User-Agent": user_agent()}, timeout=timeout, stream=True
+    )
     response.raise_for_status()
     ctype = (response.headers.get("Content-Type") or "").lower()
     if "json" not in ctype:
         raise ValueError(f"Expected JSON payload from {url}, got Content-Type={ctype}")
 
-    payload = bytearray()
-    for chunk in response.iter_content(chunk_size=16384):
-        if not chunk:
-            continue
-        payload.extend(chunk)
-        if len(payload) > MAX_GEOJSON_BYTES:
-            raise ValueError(
-                f"Response from {url} exceeded max size ({MAX_GEOJSON_BYTES} bytes)"
-            )
-
-    # Parse JSON to ensure validity
-    try:
-        data = json.loads(payload.decode("utf-8"))
-    except ValueError as e:
-        raise ValueError(f"Response from {url} is not valid JSON") from e
-
+    # Stream straight to disk (tmp + replace so a rejected/partial download never
+    # leaves a file behind). The payload is decoded once to check it's JSON before
+    # it replaces the previous copy, but it is written as received (no re-dump).
+    # A sidecar sha256 lets identical re-downloads skip replacing the file.
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+    tmp_path = output_path.with_name(output_path.name + ".part")
+    digest_path = output_path.with_name(output_path.name + ".sha256")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(tmp_path, "wb") as f:
+            for chunk in response.iter_content(chunk_size=65536):
+                if not chunk:
+                    continue
+                size += len(chunk)
+                if size > MAX_GEOJSON_BYTES:
+                    raise ValueError(
+                        f"Response from {url} exceeded max size "
+                        f"({MAX_GEOJSON_BYTES} bytes)"
+                    )
+                digest.update(chunk)
+                f.write(chunk)
+        hexdigest = digest.hexdigest()
+        try:
+            unchanged = (
+                output_path.exists()
+                and digest_path.read_text(encoding="ascii").strip() == hexdigest
+            )
+        except OSError:
+            unchanged = False
+        if unchanged:
+            log.debug("AOI %s unchanged; keeping %s", url, output_path)
+        else:
+            try:
+                _json_loads(tmp_path.read_bytes())
+            except ValueError as e:
+                raise ValueError(f"Invalid JSON payload from {url}: {e}") from e
+            tmp_path.replace(output_path)
+            digest_path.write_text(hexdigest, encoding="ascii")
+    finally:
+        response.close()
+        tmp_path.unlink(missing_ok=True)
 
     return output_path
 
@@ -749,11 +842,18 @@ def _download_url_to_file(
 def _geometry_from_file(path: str | Path):
     """
     Read a geometry from a spatial file (KML or GeoJSON).
+    Parsed geometries are cached per (path, mtime).
     """
+    path = Path(path)
+    return _geometry_from_file_cached(str(path), path.stat().st_mtime_ns)
+
+
+@functools.lru_cache(maxsize=256)
+def _geometry_from_file_cached(path_str: str, _mtime_ns: int):
     from shapely.geometry import shape
     from shapely.ops import unary_union
 
-    path = Path(path)
+    path = Path(path_str)
     suffix = path.suffix.lower()
 
     # # ---- KML ----
@@ -762,8 +862,10 @@ def _geometry_from_file(path: str | Path):
 
     # ---- GeoJSON ----
     if suffix in (".geojson", ".json"):
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        try:
+            data = _json_loads(path.read_bytes())
+        except ValueError as e:
+            raise ValueError(f"{path} is not valid JSON") from e
 
         # FeatureCollection
         if data["type"] == "FeatureCollection":
@@ -780,7 +882,13 @@ def _geometry_from_file(path: str | Path):
                 geometries = []
                 for zone_url in affected:
                     try:
-                        zone_data = requests.get(zone_url).json()
+                        zone_data = _json_loads(
+                            _SESSION.get(
+                                zone_url,
+                                headers={"User-Agent": user_agent()},
+                                timeout=30,
+                            ).content
+                        )
                         if zone_data.get("geometry"):
                             geometries.append(shape(zone_data["geometry"]))
                     except Exception:
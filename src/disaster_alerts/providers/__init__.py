@@ -1,7 +1,8 @@
 from __future__ import annotations
 
 import logging
-from typing import Any, Callable, Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
 
 from ..settings import Settings
 
@@ -38,12 +39,31 @@ def _enabled_provider_keys(settings: Settings) -> List[str]:
     return keys
 
 
+def _fetch_one(key: str, fn: ProviderFunc, settings: Settings) -> List[Event]:
+    """Run one provider; failures are logged and yield an empty list."""
+    try:
+        evs = fn(settings)
+    except Exception as e:
+        log.error("Provider '%s' failed: %s", key, e, exc_info=False)
+        return []
+    if not isinstance(evs, list):
+        log.warning("Provider '%s' returned non-list result; skipping", key)
+        return []
+    # Optionally tag provider key if a fetcher forgot (defensive)
+    for e in evs:
+        if isinstance(e, dict) and "provider" not in e:
+            e["provider"] = key
+    return evs
+
+
 def fetch_from_enabled(settings: Settings) -> List[Event]:
     """
     Fetch events from all providers enabled in settings.app.providers.
 
-    Returns a flat list of Event dicts. Failures in one provider do not prevent
-    others from returning results; errors are logged and skipped.
+    Providers are I/O bound and independent, so they run concurrently (one
+    thread each). Returns a flat list of Event dicts in provider order.
+    Failures in one provider do not prevent others from returning results;
+    errors are logged and skipped.
     """
     results: List[Event] = []
     keys = _enabled_provider_keys(settings)
@@ -51,24 +71,23 @@ def fetch_from_enabled(settings: Settings) -> List[Event]:
         log.info("No providers enabled; returning empty event list")
         return results
 
+    jobs: List[Tuple[str, ProviderFunc]] = []
     for key in keys:
         fn = REGISTRY.get(key)
         if fn is None:
             log.warning("Provider '%s' is not registered; skipping", key)
             continue
-        try:
-            evs = fn(settings)
-        except Exception as e:
-            log.error("Provider '%s' failed: %s", key, e, exc_info=False)
-            continue
-        if not isinstance(evs, list):
-            log.warning("Provider '%s' returned non-list result; skipping", key)
-            continue
-        # Optionally tag provider key if a fetcher forgot (defensive)
-        for e in evs:
-            if isinstance(e, dict) and "provider" not in e:
-                e["provider"] = key
-        results.extend(evs)
+        jobs.append((key, fn))
+
+    if len(jobs) == 1:
+        key, fn = jobs[0]
+        results.extend(_fetch_one(key, fn, settings))
+    elif jobs:
+        with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+            futures = [pool.submit(_fetch_one, key, fn, settings) for key, fn in jobs]
+            # Collect in submission order so output is deterministic.
+            for fut in futures:
+                results.extend(fut.result())
 
     log.info("Fetched total %d event(s) from %d provider(s)", len(results), len(keys))
     return results
@@ -1,27 +1,57 @@
 from __future__ import annotations
 
+import functools
 import json
 import logging
 import os
-import time
-from typing import Any, Dict, Optional
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:  # optional: faster decoding of large (Geo)JSON payloads
+    import orjson as _orjson
+except ImportError:  # pragma: no cover - stdlib fallback
+    _orjson = None
 
 log = logging.getLogger(__name__)
 
 # Defaults
 DEFAULT_TIMEOUT: float = 15.0  # seconds
 DEFAULT_RETRIES: int = 2
-DEFAULT_BACKOFF: float = 1.5  # exponential backoff base
+DEFAULT_BACKOFF: float = 1.5  # urllib3 backoff_factor: sleeps factor * 2**(n-1)
 DEFAULT_UA: str = "disaster-alerts (+contact: emre.havazli@jpl.nasa.gov)"
-
-# Reuse a single session for connection pooling
-_SESSION: requests.Session = requests.Session()
+MAX_RETRY_SLEEP: float = 30.0  # seconds; cap for Retry-After and backoff waits
+
+# Statuses worth retrying (rate limiting and transient upstream failures).
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_ACCEPT = "application/geo+json, application/json;q=0.9, */*;q=0.1"
+
+# Conditional-GET validators per request: key -> (ETag, Last-Modified, raw body).
+# On 304 the previous body is decoded afresh, so callers never see a spurious {}
+# and can't mutate each other's results. Only stable URLs (e.g. NWS active
+# alerts) ever hit; time-windowed queries (USGS) get a new key each run, so the
+# cache is LRU-bounded. get_json runs on several thread pools at once, so every
+# access goes through _ETAG_LOCK.
+ETAG_CACHE_MAX: int = 16
+_CacheKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+_ETAG_CACHE: OrderedDict[_CacheKey, Tuple[Optional[str], Optional[str], bytes]] = (
+    OrderedDict()
+)
+_ETAG_LOCK = threading.Lock()
 
 __all__ = ["get_json", "user_agent"]
 
 
+def _json_loads(data: bytes) -> Any:
+    """Decode JSON bytes with orjson when installed, else the stdlib json module."""
+    return _orjson.loads(data) if _orjson is not None else json.loads(data)
+
+
 def user_agent() -> str:
     """
     Compose a User-Agent string. Allows override via env:
@@ -30,16 +60,49 @@ def user_agent() -> str:
     return os.environ.get("DISASTER_ALERTS_UA", DEFAULT_UA)
 
 
-def _sleep_for_retry(attempt: int, backoff: float, retry_after: Optional[str]) -> None:
-    if retry_after:
-        try:
-            # Honor simple Retry-After (seconds); ignore HTTP-date formats.
-            secs = float(retry_after)
-            time.sleep(max(secs, 0.0))
-            return
-        except Exception:
-            pass
-    time.sleep(backoff**attempt)
+class _CappedRetry(Retry):
+    """Retry that honors Retry-After but never sleeps longer than MAX_RETRY_SLEEP."""
+
+    DEFAULT_BACKOFF_MAX = MAX_RETRY_SLEEP  # urllib3 1.26 reads the class attr
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.backoff_max = MAX_RETRY_SLEEP  # urllib3 2.x; carried over by new()
+
+    def get_retry_after(self, response: Any) -> Optional[float]:
+        secs = super().get_retry_after(response)
+        return None if secs is None else min(secs, MAX_RETRY_SLEEP)
+
+
+@functools.lru_cache(maxsize=4)
+def _session(retries: int, backoff: float) -> requests.Session:
+    """
+    Pooled session whose adapter retries per *retries*/*backoff*.
+    Cached so every caller with the same policy shares connections.
+    """
+    retry = _CappedRetry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,  # hand back the last response; we log it below
+    )
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=retry)
+    sess = requests.Session()
+    sess.mount("http://", adapter)
+    sess.mount("https://", adapter)
+    # User-Agent is sent per request: this runs at import, before .env is loaded.
+    sess.headers["Accept"] = _ACCEPT
+    return sess
+
+
+# Shared default session (also used for AOI downloads in plot_html_map).
+_SESSION: requests.Session = _session(DEFAULT_RETRIES, DEFAULT_BACKOFF)
+
+
+def _params_key(params: Optional[Dict[str, Any]]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((str(k), str(v)) for k, v in params.items())) if params else ()
 
 
 def get_json(
@@ -51,58 +114,63 @@ def get_json(
     backoff: float = DEFAULT_BACKOFF,
 ) -> Dict[str, Any]:
     """
-    GET a JSON (or GeoJSON) endpoint with small retry/backoff.
+    GET a JSON (or GeoJSON) endpoint over a pooled session.
     Returns {} on failure.
 
-    Retries on non-2xx/3xx responses and network errors.
+    Retries/backoff are handled by urllib3 on connection errors and
+    429/5xx responses, honoring Retry-After headers.
     Warns if Content-Type is not JSON but still attempts JSON decode.
-    Honors simple numeric Retry-After headers when present.
+    Sends If-None-Match/If-Modified-Since when a previous response for the
+    same URL/params carried validators; on 304 that response's body is
+    decoded again (a new object per call).
     """
-    hdrs = {
-        "User-Agent": user_agent(),
-        "Accept": "application/geo+json, application/json;q=0.9, */*;q=0.1",
-    }
-    if headers:
-        hdrs.update(headers)
-
-    attempt = 0
-    while True:
-        attempt += 1
-        try:
-            resp = _SESSION.get(url, params=params, headers=hdrs, timeout=timeout)
-        except requests.RequestException as e:
-            log.warning(
-                "GET %s failed on attempt %d/%d: %s", url, attempt, retries + 1, e
-            )
-            if attempt > retries:
-                return {}
-            _sleep_for_retry(attempt, backoff, None)
-            continue
-
-        # Fast-path 304
-        if resp.status_code == 304:
-            log.debug("GET %s -> 304 Not Modified", url)
+    sess = _session(retries, backoff)
+    headers = {"User-Agent": user_agent(), **(headers or {})}
+    key: _CacheKey = (url, _params_key(params))
+    with _ETAG_LOCK:
+        cached = _ETAG_CACHE.get(key)
+    if cached is not None:
+        etag, last_modified, _ = cached
+        if etag:
+            headers.setdefault("If-None-Match", etag)
+        if last_modified:
+            headers.setdefault("If-Modified-Since", last_modified)
+
+    try:
+        resp = sess.get(url, params=params, headers=headers, timeout=timeout)
+    except requests.RequestException as e:
+        log.warning("GET %s failed after %d retries: %s", url, retries, e)
+        return {}
+
+    # Fast-path 304: reuse the body from the response that set the validators
+    if resp.status_code == 304:
+        log.debug("GET %s -> 304 Not Modified", url)
+        if cached is None:
             return {}
-
-        if 200 <= resp.status_code < 300:
-            ctype = (resp.headers.get("Content-Type") or "").lower()
-            if "json" not in ctype:
-                log.warning("Expected JSON from %s but got Content-Type=%s", url, ctype)
-            try:
-                return resp.json()
-            except json.JSONDecodeError:
-                log.error("Failed to decode JSON from %s", url)
-                return {}
-        else:
-            # Non-success status
-            retry_after = resp.headers.get("Retry-After")
-            log.warning(
-                "GET %s -> HTTP %s (attempt %d/%d)",
-                url,
-                resp.status_code,
-                attempt,
-                retries + 1,
-            )
-            if attempt > retries:
-                return {}
-            _sleep_for_retry(attempt, backoff, retry_after)
+        with _ETAG_LOCK:
+            if key in _ETAG_CACHE:  # may have been evicted by another thread
+                _ETAG_CACHE.move_to_end(key)
+        return _json_loads(cached[2])
+
+    if not 200 <= resp.status_code < 300:
+        log.warning("GET %s -> HTTP %s", url, resp.status_code)
+        return {}
+
+    ctype = (resp.headers.get("Content-Type") or "").lower()
+    if "json" not in ctype:
+        log.warning("Expected JSON from %s but got Content-Type=%s", url, ctype)
+    try:
+        data = _json_loads(resp.content)
+    except ValueError:  # json/orjson decode errors are ValueError subclasses
+        log.error("Failed to decode JSON from %s", url)
+        return {}
+
+    etag = resp.headers.get("ETag")
+    last_modified = resp.headers.get("Last-Modified")
+    if etag or last_modified:
+        with _ETAG_LOCK:
+            _ETAG_CACHE[key] = (etag, last_modified, resp.content)
+            _ETAG_CACHE.move_to_end(key)
+            while len(_ETAG_CACHE) > ETAG_CACHE_MAX:
+                _ETAG_CACHE.popitem(last=False)
+    return data
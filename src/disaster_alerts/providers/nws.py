@@ -11,6 +11,12 @@ log = logging.getLogger(__name__)
 Event = Dict[str, Any]
 NWS_ACTIVE_URL = "https://api.weather.gov/alerts/active"
 
+# NWS severities that route to the "severe" group
+_SEVERE_SET = frozenset(("severe", "extreme"))
+
+# Prefer effective/onset/sent. 'updated' and 'ends' are last-resort
+_UPDATED_KEYS = ("effective", "onset", "sent", "updated", "ends")
+
 
 def _pick_str(d: Dict[str, Any], *keys: str) -> Optional[str]:
     """Return the first non-empty string value for any of keys in dict d."""
@@ -57,63 +63,64 @@ def _severity(props: Dict[str, Any]) -> Optional[str]:
     return s if isinstance(s, str) and s.strip() else None
 
 
-def _updated(props: Dict[str, Any]) -> Optional[str]:
-    # Prefer effective/onset/sent. 'updated' and 'ends' are last-resort
-    return _pick_str(props, "effective", "onset", "sent", "updated", "ends")
-
-
 def fetch_events(settings: Settings) -> List[Event]:
     """
     Fetch all active NWS alerts and normalize them into Event dicts.
     Returns an empty list on failure.
     """
     data = get_json(NWS_ACTIVE_URL)
-    feats = data.get("features") or []
+    feats = data.get("features")
     if not isinstance(feats, list):
-        log.warning("NWS response missing 'features' list")
+        if data:
+            log.warning("NWS response missing 'features' list")
         return []
 
     out: List[Event] = []
+    # Guards (not try/except) skip malformed features; nothing below raises.
     for f in feats:
-        try:
-            if not isinstance(f, dict):
-                continue
-            props = f.get("properties") or {}
-            if not isinstance(props, dict):
-                props = {}
-
-            fid = (
-                _pick_str(f, "id")
-                or _pick_str(props, "id", "@id")
-                or _pick_str(props, "event", "headline")
-                or "nws-unknown"
-            )
-
-            title = _pick_str(props, "headline", "event") or "(NWS Alert)"
-            sev = _severity(props)
-            link = _preferred_link(f, props)
-
-            ev: Event = {
-                "id": fid,
-                "provider": "nws",
-                "updated": _updated(props),
-                "title": title,
-                "severity": sev,
-                "link": link,
-                "geometry": f.get("geometry"),
-                "properties": props,  # keep full properties for downstream formatting
-                # Pipeline may override routing later; still set a sensible default.
-                "routing_key": (
-                    "severe"
-                    if (sev or "").lower() in {"severe", "extreme"}
-                    else "default"
-                ),
-            }
-            out.append(ev)
-        except Exception as e:
-            # Keep this quiet (debug) so a single malformed feature doesn't spam logs.
-            log.debug("Skipping malformed NWS feature: %s", e, exc_info=False)
+        if not isinstance(f, dict):
             continue
+        props = f.get("properties") or {}
+        if not isinstance(props, dict):
+            props = {}
+
+        fid = (
+            _pick_str(f, "id")
+            or _pick_str(props, "id", "@id")
+            or _pick_str(props, "event", "headline")
+            or "nws-unknown"
+        )
+
+        # title/updated are resolved inline (hot per-feature path)
+        title = props.get("headline")
+        if not (isinstance(title, str) and (title := title.strip())):
+            title = props.get("event")
+            if not (isinstance(title, str) and (title := title.strip())):
+                title = "(NWS Alert)"
+        updated = None
+        for k in _UPDATED_KEYS:
+            v = props.get(k)
+            if isinstance(v, str) and (v := v.strip()):
+                updated = v
+                break
+        sev = _severity(props)
+        link = _preferred_link(f, props)
+
+        ev: Event = {
+            "id": fid,
+            "provider": "nws",
+            "updated": updated,
+            "title": title,
+            "severity": sev,
+            "link": link,
+            "geometry": f.get("geometry"),
+            "properties": props,  # keep full properties for downstream formatting
+            # Pipeline may override routing later; still set a sensible default.
+            "routing_key": (
+                "severe" if sev is not None and sev.lower() in _SEVERE_SET else "default"
+            ),
+        }
+        out.append(ev)
 
     log.info("NWS: normalized %d active alert(s)", len(out))
     return out
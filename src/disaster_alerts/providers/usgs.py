@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 import logging
+import sys
+from bisect import bisect_right
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, List, Optional
 
@@ -22,28 +24,28 @@ def _iso_from_ms(ts_ms: Optional[int]) -> Optional[str]:
     if ts_ms is None:
         return None
     try:
-        return datetime.fromtimestamp(ts_ms / 1000, tz=timezone.utc).strftime(
-            "%Y-%m-%dT%H:%M:%SZ"
-        )
+        dt = datetime.fromtimestamp(ts_ms / 1000, tz=timezone.utc)
     except Exception:
         return None
+    # Same output as strftime("%Y-%m-%dT%H:%M:%SZ"), without the strftime call.
+    # Interned: many features share a timestamp, and the value is reused as a
+    # state watermark and compared downstream.
+    return sys.intern(
+        f"{dt.year:04d}-{dt.month:02d}-{dt.day:02d}"
+        f"T{dt.hour:02d}:{dt.minute:02d}:{dt.second:02d}Z"
+    )
+
+
+# Magnitude bucket upper bounds (exclusive) and their names.
+_MAG_BOUNDS = (3.0, 4.0, 5.0, 6.0, 7.0)
+_MAG_NAMES = ("Minor", "Light", "Moderate", "Strong", "Major", "Great")
 
 
 def _severity_from_mag(mag: Optional[float]) -> Optional[str]:
     """USGS-ish buckets; keep strings capitalized to match NWS style."""
     if mag is None:
         return None
-    if mag < 3.0:
-        return "Minor"
-    if mag < 4.0:
-        return "Light"
-    if mag < 5.0:
-        return "Moderate"
-    if mag < 6.0:
-        return "Strong"
-    if mag < 7.0:
-        return "Major"
-    return "Great"
+    return _MAG_NAMES[bisect_right(_MAG_BOUNDS, mag)]
 
 
 def _float_or_none(x: Any) -> Optional[float]:
@@ -78,54 +80,50 @@ def fetch_events(settings: Settings) -> List[Event]:
     }
 
     data = get_json(USGS_FDSN_URL, params=params)
-    feats = data.get("features") or []
+    feats = data.get("features")
     if not isinstance(feats, list):
-        log.warning("USGS response missing 'features' list")
+        if data:
+            log.warning("USGS response missing 'features' list")
         return []
 
     out: List[Event] = []
+    # Guards (not try/except) skip malformed features; nothing below raises.
     for f in feats:
-        try:
-            if not isinstance(f, dict):
-                continue
-            fid = str(f.get("id") or "").strip()
-            props = f.get("properties") or {}
-            if not isinstance(props, dict):
-                props = {}
-            geom = f.get("geometry")
-
-            mag = _float_or_none(props.get("mag"))
-            updated = _iso_from_ms(props.get("updated")) or _iso_from_ms(
-                props.get("time")
-            )
-            title = props.get("title") or (
-                f"M {mag:.1f}" if mag is not None else "Earthquake"
-            )
-            link = props.get("url") if isinstance(props.get("url"), str) else None
-
-            # depth_km from geometry.coordinates[2] (USGS depth is km in GeoJSON)
-            if isinstance(geom, dict):
-                coords = geom.get("coordinates")
-                if isinstance(coords, list) and len(coords) >= 3:
-                    depth_km = _float_or_none(coords[2])
-                    if depth_km is not None:
-                        props.setdefault("depth_km", depth_km)
-
-            ev: Event = {
-                "id": fid or title,  # fallback to title if id somehow absent
-                "provider": "usgs",
-                "updated": updated,
-                "title": title,
-                "severity": _severity_from_mag(mag),
-                "link": link,
-                "geometry": geom,
-                "properties": props,
-                "routing_key": "default",
-            }
-            out.append(ev)
-        except Exception as e:
-            log.debug("Skipping malformed USGS feature: %s", e, exc_info=False)
+        if not isinstance(f, dict):
             continue
+        fid = str(f.get("id") or "").strip()
+        props = f.get("properties") or {}
+        if not isinstance(props, dict):
+            props = {}
+        geom = f.get("geometry")
+
+        mag = _float_or_none(props.get("mag"))
+        updated = _iso_from_ms(props.get("updated")) or _iso_from_ms(props.get("time"))
+        title = props.get("title") or (
+            f"M {mag:.1f}" if mag is not None else "Earthquake"
+        )
+        link = props.get("url") if isinstance(props.get("url"), str) else None
+
+        # depth_km from geometry.coordinates[2] (USGS depth is km in GeoJSON)
+        if isinstance(geom, dict):
+            coords = geom.get("coordinates")
+            if isinstance(coords, list) and len(coords) >= 3:
+                depth_km = _float_or_none(coords[2])
+                if depth_km is not None:
+                    props.setdefault("depth_km", depth_km)
+
+        ev: Event = {
+            "id": fid or title,  # fallback to title if id somehow absent
+            "provider": "usgs",
+            "updated": updated,
+            "title": title,
+            "severity": _severity_from_mag(mag),
+            "link": link,
+            "geometry": geom,
+            "properties": props,
+            "routing_key": "default",
+        }
+        out.append(ev)
 
     log.info("USGS: normalized %d recent event(s) (minmag=%.1f)", len(out), minmag)
     return out
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional, Tuple
+import functools
+import re
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
 
-from .settings import EarthquakeThresholds, Thresholds, WeatherThresholds
+from .settings import Thresholds
 
 Event = Dict[str, Any]
 
@@ -15,6 +17,7 @@ __all__ = [
 # -----------------------------------------------------------------------------
 
 Coord = Tuple[float, float]  # (lon, lat)
+BBox = Tuple[float, float, float, float]  # (xmin, ymin, xmax, ymax)
 
 
 def _is_number(x: Any) -> bool:
@@ -62,68 +65,176 @@ def _as_point_from_geometry(geom: Optional[Dict[str, Any]]) -> Optional[Coord]:
     return None
 
 
-def _point_in_ring(pt: Coord, ring: List[List[float]]) -> bool:
+# Precomputed ray-casting edge: (x1, y1, y2, dx/dy) for the edge (x1,y1)->(x2,y2).
+Edge = Tuple[float, float, float, float]
+
+
+class _Ring(NamedTuple):
+    """A ring as a precomputed edge table plus its bounding box."""
+
+    edges: Tuple[Edge, ...]  # empty for degenerate rings (< 3 vertices)
+    bbox: BBox  # (xmin, ymin, xmax, ymax)
+
+
+class _Polygon(NamedTuple):
+    outer: _Ring
+    holes: Tuple[_Ring, ...]
+
+
+def _compile_ring(ring: Any) -> _Ring:
+    xs = [float(p[0]) for p in ring]
+    ys = [float(p[1]) for p in ring]
+    bbox = (min(xs), min(ys), max(xs), max(ys))
+    if len(xs) < 3:
+        return _Ring((), bbox)
+    # Edges (prev -> cur), starting with the closing edge last -> first. The
+    # per-edge slope is computed here once instead of per point tested.
+    edges = tuple(
+        (x1, y1, y2, (x2 - x1) / (y2 - y1 + 1e-15))
+        for x1, y1, x2, y2 in zip(xs[-1:] + xs[:-1], ys[-1:] + ys[:-1], xs, ys)
+    )
+    return _Ring(edges, bbox)
+
+
+def _compile_polygon(polygon_coords: Any) -> Optional[_Polygon]:
+    """
+    [outer_ring, hole1, ...] -> _Polygon; None if the outer ring is empty or
+    malformed. Empty or malformed holes are skipped (they exclude nothing).
+    """
+    try:
+        outer, *holes = polygon_coords
+        compiled_outer = _compile_ring(outer)
+    except (TypeError, ValueError, IndexError):
+        return None
+    compiled_holes = []
+    for hole in holes:
+        try:
+            compiled_holes.append(_compile_ring(hole))
+        except (TypeError, ValueError, IndexError):
+            continue
+    return _Polygon(compiled_outer, tuple(compiled_holes))
+
+
+def _compile_aoi(aoi: Dict[str, Any]) -> List[_Polygon]:
+    """
+    Convert an AOI Polygon/MultiPolygon into compiled polygons, once per
+    filter_events call. Malformed polygons are dropped (they contain nothing).
+    Polygons are ordered by bbox area (largest first) so most hits resolve on
+    the first polygon tried.
+    """
+    gtype = aoi.get("type")
+    coords = aoi.get("coordinates")
+    if not isinstance(coords, list):
+        return []
+    if gtype == "Polygon":
+        polygons = [coords]
+    elif gtype == "MultiPolygon":
+        polygons = coords
+    else:
+        return []
+    compiled = (_compile_polygon(poly) for poly in polygons)
+    return sorted(
+        (poly for poly in compiled if poly is not None),
+        key=_bbox_area,
+        reverse=True,
+    )
+
+
+def _bbox_area(polygon: _Polygon) -> float:
+    xmin, ymin, xmax, ymax = polygon.outer.bbox
+    return (xmax - xmin) * (ymax - ymin)
+
+
+def _in_bbox(x: float, y: float, bbox: BBox) -> bool:
+    return bbox[0] <= x <= bbox[2] and bbox[1] <= y <= bbox[3]
+
+
+def _point_in_ring(x: float, y: float, ring: _Ring) -> bool:
     """
     Ray casting point-in-polygon for a single ring (outer or hole).
-    ring: list of [lon, lat]
     """
-    x, y = pt
     inside = False
-    n = len(ring)
-    if n < 3:
-        return False
-    for i in range(n):
-        x1, y1 = ring[i][0], ring[i][1]
-        x2, y2 = ring[(i + 1) % n][0], ring[(i + 1) % n][1]
+    for x1, y1, y2, slope in ring.edges:
         # Check if the ray intersects the edge
-        intersects = ((y1 > y) != (y2 > y)) and (
-            x < (x2 - x1) * (y - y1) / (y2 - y1 + 1e-15) + x1
-        )
-        if intersects:
+        if (y1 > y) != (y2 > y) and x < slope * (y - y1) + x1:
             inside = not inside
     return inside
 
 
-def _point_in_polygon(pt: Coord, polygon_coords: List[List[List[float]]]) -> bool:
-    """
-    polygon_coords: [outer_ring, hole1, hole2, ...], each ring is [[lon,lat], ...]
-    """
-    if not polygon_coords:
-        return False
-    outer = polygon_coords[0]
-    if not _point_in_ring(pt, outer):
+def _point_in_polygon(x: float, y: float, polygon: _Polygon) -> bool:
+    # Outside a ring's bbox means outside the ring.
+    if not _in_bbox(x, y, polygon.outer.bbox) or not _point_in_ring(x, y, polygon.outer):
         return False
     # If inside outer, ensure it's not inside any hole
-    for hole in polygon_coords[1:]:
-        if _point_in_ring(pt, hole):
+    for hole in polygon.holes:
+        if _in_bbox(x, y, hole.bbox) and _point_in_ring(x, y, hole):
             return False
     return True
 
 
-def _point_in_multipolygon(
-    pt: Coord, multipoly_coords: List[List[List[List[float]]]]
+def _aoi_contains(
+    aoi: Dict[str, Any],
+    pt: Coord,
+    compiled: Optional[List[_Polygon]] = None,
 ) -> bool:
     """
-    multipoly_coords: [ polygon1, polygon2, ... ]
-    Each polygon is [outer_ring, hole1, ...]; each ring is [[lon,lat], ...]
+    True if point is inside AOI (Polygon/MultiPolygon). Returns False on malformed AOI.
+    `compiled` is the precomputed result of _compile_aoi(aoi), if available.
     """
-    for polygon in multipoly_coords:
-        if _point_in_polygon(pt, polygon):
-            return True
-    return False
+    if compiled is None:
+        compiled = _compile_aoi(aoi)
+    x, y = pt
+    return any(_point_in_polygon(x, y, polygon) for polygon in compiled)
+
+
+# AOIs with at least this many edges go through shapely (GEOS) when installed;
+# below it, the pure-Python ray casting above is cheaper than building a geometry.
+SHAPELY_MIN_EDGES = 512
+
 
+def _edge_count(compiled: List[_Polygon]) -> int:
+    return sum(
+        len(poly.outer.edges) + sum(len(h.edges) for h in poly.holes)
+        for poly in compiled
+    )
 
-def _aoi_contains(aoi: Dict[str, Any], pt: Coord) -> bool:
+
+def _shapely_contains_many(
+    aoi: Dict[str, Any], pts: List[Coord]
+) -> Optional[List[Optional[bool]]]:
     """
-    True if point is inside AOI (Polygon/MultiPolygon). Returns False on malformed AOI.
+    Test all points against the AOI in one vectorized GEOS call.
+    Returns None when shapely is unavailable or the AOI can't be built,
+    so callers fall back to the pure-Python path.
+
+    GEOS puts boundary points (outer ring or hole edges) outside, while ray
+    casting decides them by its half-open edge rule. So that results don't
+    depend on which path ran, points on the boundary come back as None and
+    are left to _aoi_contains.
     """
-    gtype = aoi.get("type")
-    coords = aoi.get("coordinates")
-    if gtype == "Polygon" and isinstance(coords, list):
-        return _point_in_polygon(pt, coords)
-    if gtype == "MultiPolygon" and isinstance(coords, list):
-        return _point_in_multipolygon(pt, coords)
-    return False
+    try:
+        import shapely
+        from shapely.geometry import shape
+    except ImportError:
+        return None
+    xs = [p[0] for p in pts]
+    ys = [p[1] for p in pts]
+    try:
+        geom = shape(aoi)
+        contains_xy = getattr(shapely, "contains_xy", None)  # shapely >= 2.0
+        if contains_xy is not None:
+            shapely.prepare(geom)
+            hits = contains_xy(geom, xs, ys)
+            edges = shapely.intersects_xy(geom, xs, ys) & ~hits
+        else:  # shapely 1.8
+            from shapely.prepared import prep
+            from shapely.vectorized import contains, touches
+
+            hits = contains(prep(geom), xs, ys)
+            edges = touches(geom, xs, ys)
+    except Exception:
+        return None
+    return [None if e else bool(h) for h, e in zip(hits, edges)]
 
 
 # -----------------------------------------------------------------------------
@@ -151,20 +262,23 @@ _SEVERITY_RANK = {
 def _severity_rank(name: Optional[str]) -> int:
     if not name or not isinstance(name, str):
         return _SEVERITY_RANK["unknown"]
+    return _severity_rank_str(name)
+
+
+@functools.lru_cache(maxsize=64)
+def _severity_rank_str(name: str) -> int:
+    # Providers emit a handful of distinct strings, so this saturates at once.
     return _SEVERITY_RANK.get(name.strip().lower(), _SEVERITY_RANK["unknown"])
 
 
-def _passes_global_severity(e: Event, thresholds: Thresholds) -> bool:
+def _passes_global_severity(e: Event, min_rank: Optional[int]) -> bool:
     """
-    Enforce thresholds.global_.min_severity, if configured.
+    Enforce thresholds.global_.min_severity (pre-ranked as `min_rank`), if configured.
     We compare normalized ranks across providers.
     """
-    min_req = thresholds.global_.min_severity
-    if not min_req:
+    if min_rank is None:
         return True
-    want = _severity_rank(min_req)
-    have = _severity_rank(e.get("severity"))
-    return have >= want
+    return _severity_rank(e.get("severity")) >= min_rank
 
 
 # -----------------------------------------------------------------------------
@@ -172,9 +286,9 @@ def _passes_global_severity(e: Event, thresholds: Thresholds) -> bool:
 # -----------------------------------------------------------------------------
 
 
-def _as_earthquake_values(e: Event) -> Dict[str, Optional[float]]:
+def _as_earthquake_values(e: Event) -> Tuple[Optional[float], Optional[float]]:
     """
-    Extract magnitude & depth_km from a USGS-like earthquake event.
+    Extract (magnitude, depth_km) from a USGS-like earthquake event.
     USGS GeoJSON keys: feature.properties.mag, feature.geometry.coordinates[2] (depth in km)
     We also check common alternates like 'magnitude', 'depth'.
     """
@@ -194,15 +308,15 @@ def _as_earthquake_values(e: Event) -> Dict[str, Optional[float]]:
             ):
                 depth = float(coords[2])
 
-    return {
-        "magnitude": float(mag) if _is_number(mag) else None,
-        "depth_km": float(depth) if _is_number(depth) else None,
-    }
+    return (
+        float(mag) if _is_number(mag) else None,
+        float(depth) if _is_number(depth) else None,
+    )
 
 
-def _as_weather_values(e: Event) -> Dict[str, Optional[float]]:
+def _as_weather_values(e: Event) -> Tuple[Optional[float], Optional[float]]:
     """
-    Extract simple weather-related metrics if present.
+    Extract simple weather-related metrics (wind_gust_mps, rainfall_mm_hr) if present.
     NWS alerts often don’t carry numeric gust/rainfall; we only enforce thresholds
     when numeric values exist in properties (so rules remain permissive).
     Common keys (if present): wind_gust_mps, rainfall_mm_hr.
@@ -210,10 +324,10 @@ def _as_weather_values(e: Event) -> Dict[str, Optional[float]]:
     props = e.get("properties", {}) or {}
     gust = props.get("wind_gust_mps")
     rain = props.get("rainfall_mm_hr")
-    return {
-        "wind_gust_mps": float(gust) if _is_number(gust) else None,
-        "rainfall_mm_hr": float(rain) if _is_number(rain) else None,
-    }
+    return (
+        float(gust) if _is_number(gust) else None,
+        float(rain) if _is_number(rain) else None,
+    )
 
 
 # -----------------------------------------------------------------------------
@@ -221,70 +335,96 @@ def _as_weather_values(e: Event) -> Dict[str, Optional[float]]:
 # -----------------------------------------------------------------------------
 
 
-def _passes_earthquake_thresholds(
-    e: Event, thr: Optional[EarthquakeThresholds]
-) -> bool:
-    if thr is None:
+class _Limits(NamedTuple):
+    """Threshold values resolved once per filter_events call (None = no limit)."""
+
+    min_rank: Optional[int]
+    min_magnitude: Optional[float]
+    max_depth_km: Optional[float]
+    include_re: Optional["re.Pattern[str]"]
+    exclude_re: Optional["re.Pattern[str]"]
+    wind_gust_mps: Optional[float]
+    rainfall_mm_hr: Optional[float]
+
+
+def _compile_limits(thresholds: Thresholds) -> _Limits:
+    min_req = thresholds.global_.min_severity
+    eq = thresholds.earthquake
+    wx = thresholds.weather
+    return _Limits(
+        min_rank=_severity_rank(min_req) if min_req else None,
+        min_magnitude=eq.min_magnitude if eq else None,
+        max_depth_km=eq.max_depth_km if eq else None,
+        include_re=_patterns_regex(tuple(wx.include_events or ())) if wx else None,
+        exclude_re=_patterns_regex(tuple(wx.exclude_events or ())) if wx else None,
+        wind_gust_mps=wx.wind_gust_mps if wx else None,
+        rainfall_mm_hr=wx.rainfall_mm_hr if wx else None,
+    )
+
+
+def _passes_earthquake_thresholds(e: Event, lim: _Limits) -> bool:
+    if lim.min_magnitude is None and lim.max_depth_km is None:
         return True
-    vals = _as_earthquake_values(e)
-    mag = vals["magnitude"]
-    depth = vals["depth_km"]
+    mag, depth = _as_earthquake_values(e)
 
-    if thr.min_magnitude is not None and mag is not None and mag < thr.min_magnitude:
+    if lim.min_magnitude is not None and mag is not None and mag < lim.min_magnitude:
         return False
     # If magnitude missing and a min_magnitude threshold exists, keep (permissive).
-    if thr.max_depth_km is not None and depth is not None and depth > thr.max_depth_km:
+    if lim.max_depth_km is not None and depth is not None and depth > lim.max_depth_km:
         return False
     return True
 
 
 def _weather_event_text(e: Event) -> str:
+    """Lowercased event text used for include/exclude matching."""
     # Prefer NWS properties.event, then title/headline
     props = e.get("properties") or {}
     ev = props.get("event") or e.get("title") or ""
-    return str(ev).strip()
+    return str(ev).strip().lower()
 
 
-def _matches_any(patterns: List[str], text: str) -> bool:
-    t = text.lower()
-    return any((pat or "").lower() in t for pat in patterns)
+@functools.lru_cache(maxsize=32)
+def _patterns_regex(patterns: Tuple[str, ...]) -> Optional["re.Pattern[str]"]:
+    """
+    One alternation regex for case-insensitive substring matching of patterns
+    (match against lowercased text). None when there are no patterns.
+    """
+    if not patterns:
+        return None
+    return re.compile("|".join(re.escape((pat or "").lower()) for pat in patterns))
 
 
-def _passes_weather_thresholds(e: Event, thr: Optional[WeatherThresholds]) -> bool:
-    if thr is None:
-        return True
-
-    # 1) categorical filters
-    evt = _weather_event_text(e)
-    if thr.include_events:
-        if not _matches_any(thr.include_events, evt):
+def _passes_weather_thresholds(e: Event, lim: _Limits) -> bool:
+    # 1) categorical filters (event text lowercased once, only when needed)
+    if lim.include_re is not None or lim.exclude_re is not None:
+        evt = _weather_event_text(e)
+        if lim.include_re is not None and lim.include_re.search(evt) is None:
             return False
-    if thr.exclude_events:
-        if _matches_any(thr.exclude_events, evt):
+        if lim.exclude_re is not None and lim.exclude_re.search(evt) is not None:
             return False
 
     # 2) numeric filters (as before)
-    vals = _as_weather_values(e)
-    gust = vals["wind_gust_mps"]
-    rain = vals["rainfall_mm_hr"]
+    if lim.wind_gust_mps is None and lim.rainfall_mm_hr is None:
+        return True
+    gust, rain = _as_weather_values(e)
 
-    if thr.wind_gust_mps is not None and gust is not None and gust < thr.wind_gust_mps:
+    if lim.wind_gust_mps is not None and gust is not None and gust < lim.wind_gust_mps:
         return False
     if (
-        thr.rainfall_mm_hr is not None
+        lim.rainfall_mm_hr is not None
         and rain is not None
-        and rain < thr.rainfall_mm_hr
+        and rain < lim.rainfall_mm_hr
     ):
         return False
     return True
 
 
-def _passes_provider_thresholds(e: Event, thresholds: Thresholds) -> bool:
+def _passes_provider_thresholds(e: Event, lim: _Limits) -> bool:
     prov = str(e.get("provider", "")).lower()
     if prov == "usgs":
-        return _passes_earthquake_thresholds(e, thresholds.earthquake)
+        return _passes_earthquake_thresholds(e, lim)
     if prov == "nws":
-        return _passes_weather_thresholds(e, thresholds.weather)
+        return _passes_weather_thresholds(e, lim)
     # Unknown providers: keep permissive unless a global severity rule excludes them
     return True
 
@@ -294,13 +434,47 @@ def _passes_provider_thresholds(e: Event, thresholds: Thresholds) -> bool:
 # -----------------------------------------------------------------------------
 
 
-def _in_aoi(e: Event, aoi: Optional[Dict[str, Any]]) -> bool:
+def _in_aoi(
+    e: Event,
+    aoi: Optional[Dict[str, Any]],
+    compiled: Optional[List[_Polygon]] = None,
+    memo: Optional[Dict[Coord, bool]] = None,
+) -> bool:
     if not aoi:
         return True  # no AOI constraint
     pt = _as_point_from_geometry(e.get("geometry"))
     if pt is None:
         return True  # no geometry → do not exclude
-    return _aoi_contains(aoi, pt)
+    if memo is None:
+        return _aoi_contains(aoi, pt, compiled)
+    # Alerts sharing a polygon share its first vertex; test each point once.
+    hit = memo.get(pt)
+    if hit is None:
+        hit = memo[pt] = _aoi_contains(aoi, pt, compiled)
+    return hit
+
+
+def _prefill_aoi_memo(
+    events: List[Event],
+    lim: _Limits,
+    aoi: Dict[str, Any],
+    memo: Dict[Coord, bool],
+) -> None:
+    """Resolve every candidate point with one shapely call (large AOIs only)."""
+    pts = list(
+        {
+            pt: None
+            for e in events
+            if _passes_global_severity(e, lim.min_rank)
+            and (pt := _as_point_from_geometry(e.get("geometry"))) is not None
+        }
+    )
+    if not pts:
+        return
+    hits = _shapely_contains_many(aoi, pts)
+    if hits is not None:
+        # Boundary points (None) stay unresolved; ray casting decides them.
+        memo.update((pt, hit) for pt, hit in zip(pts, hits) if hit is not None)
 
 
 # -----------------------------------------------------------------------------
@@ -312,18 +486,24 @@ def filter_events(
     events: List[Event], thresholds: Thresholds, aoi: Optional[Dict[str, Any]]
 ) -> List[Event]:
     """
-    Apply filters in order:
+    Apply filters in order (cheapest / most selective first; all must pass):
       1) global severity (provider-agnostic)
-      2) provider-specific thresholds (earthquake, weather, …)
-      3) AOI inclusion (if configured)
+      2) AOI inclusion (if configured; bbox-gated, memoized per point; large
+         AOIs are resolved in one shapely call when shapely is installed)
+      3) provider-specific thresholds (earthquake, weather, …)
     """
+    lim = _compile_limits(thresholds)
+    compiled = _compile_aoi(aoi) if aoi else None
+    memo: Dict[Coord, bool] = {}
+    if compiled and _edge_count(compiled) >= SHAPELY_MIN_EDGES:
+        _prefill_aoi_memo(events, lim, aoi, memo)
     out: List[Event] = []
     for e in events:
-        if not _passes_global_severity(e, thresholds):
+        if not _passes_global_severity(e, lim.min_rank):
             continue
-        if not _passes_provider_thresholds(e, thresholds):
+        if not _in_aoi(e, aoi, compiled, memo):
             continue
-        if not _in_aoi(e, aoi):
+        if not _passes_provider_thresholds(e, lim):
             continue
         out.append(e)
     return out
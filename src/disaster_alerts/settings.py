@@ -2,16 +2,28 @@ from __future__ import annotations
 
 import os
 import re
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, FrozenSet, List, NamedTuple, Optional, Union
 
 import yaml
-from pydantic import BaseModel, ConfigDict, Field, ValidationError, field_validator
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Field,
+    StrictStr,
+    TypeAdapter,
+    ValidationError,
+    field_serializer,
+    field_validator,
+)
+from pydantic_core import PydanticCustomError
 
 __all__ = [
     "EmailConfig",
     "ProvidersConfig",
     "RoutingConfig",
+    "RoutingCtx",
     "GlobalThresholds",
     "EarthquakeThresholds",
     "WeatherThresholds",
@@ -25,40 +37,59 @@ __all__ = [
 # ---------- tiny .env loader (opt-in, no external dependency) ----------
 
 
+# One KEY=VALUE per line; blank lines, '#' comments and lines without '=' never match.
+_DOTENV_LINE = re.compile(r"^[^\S\n]*([^#=\s][^=\n]*?)[^\S\n]*=([^\n]*)$", re.MULTILINE)
+
+
 def _load_dotenv(dotenv_path: Path) -> None:
     """Load KEY=VALUE pairs from a .env file into os.environ if not already set."""
     if not dotenv_path.exists():
         return
-    for line in dotenv_path.read_text(encoding="utf-8").splitlines():
-        line = line.strip()
-        if not line or line.startswith("#") or "=" not in line:
-            continue
-        key, val = line.split("=", 1)
-        key = key.strip()
-        val = val.strip().strip("'").strip('"')
-        os.environ.setdefault(key, val)
+    for m in _DOTENV_LINE.finditer(dotenv_path.read_text(encoding="utf-8")):
+        val = m.group(2).strip().strip("'").strip('"')
+        os.environ.setdefault(m.group(1), val)
 
 
 # ---------- helpers ----------
 
 _ENV_VAR_PATTERN = re.compile(r"\$\{([A-Z0-9_]+)\}")
 
-_EMAIL_RE = re.compile(r"^[A-Za-z0-9._%+\-]+@[A-Za-z0-9.\-]+\.[A-Za-z]{2,}$")
+# Unanchored; always use .fullmatch (which also rejects a trailing newline).
+_EMAIL_RE = re.compile(r"[A-Za-z0-9._%+\-]+@[A-Za-z0-9.\-]+\.[A-Za-z]{2,}")
 
 
-def _env_expand(value: Any) -> Any:
-    """Expand ${VAR} using environment variables within YAML scalar strings."""
-    if isinstance(value, str):
+def _env_repl(match: re.Match[str]) -> str:
+    var = match.group(1)
+    return os.environ.get(var, match.group(0))
 
-        def repl(match: re.Match[str]) -> str:
-            var = match.group(1)
-            return os.environ.get(var, match.group(0))
 
-        return _ENV_VAR_PATTERN.sub(repl, value)
+def _env_expand(value: Any) -> Any:
+    """
+    Expand ${VAR} using environment variables within YAML scalar strings.
+    Containers without any substitution are returned as-is (not rebuilt).
+    """
+    if isinstance(value, str):
+        if "${" not in value:
+            return value
+        return _ENV_VAR_PATTERN.sub(_env_repl, value)
     if isinstance(value, dict):
-        return {k: _env_expand(v) for k, v in value.items()}
+        out: Optional[Dict[Any, Any]] = None
+        for k, v in value.items():
+            nv = _env_expand(v)
+            if nv is not v and out is None:
+                out = dict(value)
+            if out is not None:
+                out[k] = nv
+        return value if out is None else out
     if isinstance(value, list):
-        return [_env_expand(v) for v in value]
+        items: Optional[List[Any]] = None
+        for i, v in enumerate(value):
+            nv = _env_expand(v)
+            if nv is not v and items is None:
+                items = list(value)
+            if items is not None:
+                items[i] = nv
+        return value if items is None else items
     return value
 
 
@@ -72,15 +103,19 @@ def _read_yaml(path: Path) -> Dict[str, Any]:
 # ---------- domain validation utils ----------
 
 
-def _is_number_pair(x: Any) -> bool:
-    try:
-        return (
-            isinstance(x, (list, tuple))
-            and len(x) == 2
-            and all(isinstance(v, (int, float)) for v in x)
-        )
-    except Exception:
-        return False
+def _is_number_ring(ring: List[Any]) -> bool:
+    """
+    True if every point is an [x, y] pair of numbers
+    (one flat loop, no per-point call).
+    """
+    num = (int, float)
+    for pt in ring:
+        if not isinstance(pt, (list, tuple)) or len(pt) != 2:
+            return False
+        x, y = pt
+        if not isinstance(x, num) or not isinstance(y, num):
+            return False
+    return True
 
 
 def _validate_geojson_polygon(coords: Any) -> bool:
@@ -90,7 +125,7 @@ def _validate_geojson_polygon(coords: Any) -> bool:
     outer = coords[0]
     if not isinstance(outer, list) or len(outer) < 4:
         return False
-    if not all(_is_number_pair(pt) for pt in outer):
+    if not _is_number_ring(outer):
         return False
     # Optionally ensure ring closure; most APIs give closed rings already.
     return True
@@ -122,7 +157,7 @@ class EmailConfig(BaseModel):
     def _validate_user(cls, v: Optional[str]) -> Optional[str]:
         if v is None:
             return v
-        if not _EMAIL_RE.match(v):
+        if not _EMAIL_RE.fullmatch(v):
             raise ValueError("YAGMAIL_USER looks invalid; expected an email address")
         return v
 
@@ -136,12 +171,34 @@ class ProvidersConfig(BaseModel):
     usgs: bool = True
 
 
+class RoutingCtx(NamedTuple):
+    """Routing rules in the shape the grouping loop consumes."""
+
+    forced: Optional[str]  # effective force_group (None when unset/"default")
+    drop_groups: FrozenSet[str]
+    merge: Dict[str, str]
+
+
 class RoutingConfig(BaseModel):
     force_group: Optional[str] = None
     fallback_to_default: bool = True
     merge: Dict[str, str] = Field(default_factory=dict)
     drop_groups: List[str] = Field(default_factory=list)
 
+    @property
+    def ctx(self) -> RoutingCtx:
+        """
+        Routing rules as a RoutingCtx. Built on every access (it's tiny), so
+        in-place edits to drop_groups/merge are always honored; callers read it
+        once per grouping pass.
+        """
+        force = self.force_group.strip() if self.force_group else None
+        return RoutingCtx(
+            forced=force if force and force.lower() != "default" else None,
+            drop_groups=frozenset(self.drop_groups or ()),
+            merge=dict(self.merge or {}),
+        )
+
 
 class GlobalThresholds(BaseModel):
     min_severity: Optional[str] = None  # "Minor"|"Moderate"|"Severe"|"Extreme"
@@ -164,6 +221,14 @@ class AppConfig(BaseModel):
         default=False,
         description="Generate an HTML file with geometries of events AOIs",
     )
+    resolve_wkt_via_http: bool = Field(
+        default=True,
+        description="Fetch event detail JSON for WKT when the event has no geometry",
+    )
+    wkt_cache_ttl_minutes: int = Field(
+        default=360,
+        description="Minutes to reuse on-disk WKT lookups (data/wkt_cache); 0 disables",
+    )
 
     @field_validator("log_level")
     @classmethod
@@ -240,47 +305,44 @@ class Thresholds(BaseModel):
     weather: Optional[WeatherThresholds] = None
 
 
-class Recipients(BaseModel):
+# Built once at import; validates the recipients.yaml shape.
+_RECIPIENTS_ADAPTER: TypeAdapter[Dict[str, List[str]]] = TypeAdapter(
+    Dict[str, List[StrictStr]]
+)
+
+
+@dataclass(slots=True)
+class Recipients:
     """Mapping of routing keys → recipient lists (emails)."""
 
-    model_config = ConfigDict(extra="allow")
+    groups: Dict[str, List[str]] = field(default_factory=dict)
 
     @classmethod
     def from_raw(cls, raw: Dict[str, Any]) -> "Recipients":
+        # Shape check (mapping of lists of strings) in one core-validator pass
+        raw = _RECIPIENTS_ADAPTER.validate_python(raw)
         # Validate each list contains valid emails
         for key, val in raw.items():
-            if not isinstance(val, list) or not all(isinstance(x, str) for x in val):
-                raise ValidationError.from_exception_data(
-                    "Recipients",
-                    [
-                        {
-                            "type": "value_error",
-                            "loc": (key,),
-                            "msg": "each recipients list must be a list of strings (emails)",
-                            "input": val,
-                        }
-                    ],
-                )
-            bad = [e for e in val if not _EMAIL_RE.match(e)]
+            bad = [e for e in val if not _EMAIL_RE.fullmatch(e)]
             if bad:
                 raise ValidationError.from_exception_data(
                     "Recipients",
                     [
                         {
-                            "type": "value_error.email",
+                            "type": PydanticCustomError(
+                                "value_error.email",
+                                "invalid email(s): {bad}",
+                                {"bad": bad},
+                            ),
                             "loc": (key,),
-                            "msg": f"invalid email(s): {bad}",
                             "input": val,
                         }
                     ],
                 )
-        obj = cls()
-        for k, v in raw.items():
-            setattr(obj, k, v)
-        return obj
+        return cls(groups=raw)
 
     def get(self, key: str, default: Optional[List[str]] = None) -> List[str]:
-        return getattr(self, key, default or [])
+        return self.groups.get(key, default or [])
 
 
 class Paths(BaseModel):
@@ -301,12 +363,24 @@ class Paths(BaseModel):
 class Settings(BaseModel):
     """Single source of truth for runtime configuration."""
 
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     paths: Paths
     app: AppConfig
     thresholds: Thresholds = Field(default_factory=Thresholds)
     recipients: Recipients = Field(default_factory=Recipients)
     email: EmailConfig
 
+    @field_validator("recipients", mode="before")
+    @classmethod
+    def _coerce_recipients(cls, v: Any) -> Any:
+        # Accept a raw {key: [emails]} mapping as well as a Recipients instance
+        return Recipients.from_raw(v) if isinstance(v, dict) else v
+
+    @field_serializer("recipients")
+    def _dump_recipients(self, v: Recipients) -> Dict[str, List[str]]:
+        return v.groups  # same {key: [emails]} shape as recipients.yaml
+
     # ----------------- loader -----------------
 
     @classmethod
@@ -1,22 +1,29 @@
 from __future__ import annotations
 
+import functools
 import json
 import logging
 import os
+from collections import OrderedDict, defaultdict
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import orjson as _orjson
+except ImportError:  # pragma: no cover - stdlib fallback
+    _orjson = None
 
 log = logging.getLogger(__name__)
 
 # --------------------------- helpers ---------------------------
 
 
-def _parse_iso8601(ts: Optional[str]) -> Optional[datetime]:
+def _parse_iso8601(ts: Optional[str]) -> Optional[float]:
     """
-    Parse a common subset of ISO8601 into an aware UTC datetime.
-    Returns None if invalid/empty.
+    Parse a common subset of ISO8601 into a POSIX timestamp (seconds, UTC).
+    Naive times are taken as UTC. Returns None if invalid/empty.
 
     Accepts:
       2025-10-29T21:36:47Z
@@ -27,32 +34,37 @@ def _parse_iso8601(ts: Optional[str]) -> Optional[datetime]:
     """
     if not ts or not isinstance(ts, str):
         return None
+    return _parse_iso8601_str(ts)
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_iso8601_str(ts: str) -> Optional[float]:
+    # Batches repeat the same few timestamps; pure function, safe to memoize.
     s = ts.strip()
     try:
         # Normalize trailing 'Z' to +00:00 for fromisoformat
-        if s.endswith("Z"):
-            s = s[:-1] + "+00:00"
-        dt = datetime.fromisoformat(s)
+        dt = datetime.fromisoformat(s[:-1] + "+00:00" if s.endswith("Z") else s)
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return dt.timestamp()
     except Exception:
         return None
-    # Make naive datetimes UTC-aware
-    if dt.tzinfo is None:
-        dt = dt.replace(tzinfo=timezone.utc)
-    else:
-        dt = dt.astimezone(timezone.utc)
-    return dt
 
 
 def _is_newer(a: Optional[str], b: Optional[str]) -> bool:
     """
     True if ISO timestamp `a` is strictly newer than `b`. None is lowest.
     """
-    da, db = _parse_iso8601(a), _parse_iso8601(b)
-    if da is None:
+    return _is_newer_parsed(_parse_iso8601(a), _parse_iso8601(b))
+
+
+def _is_newer_parsed(ta: Optional[float], tb: Optional[float]) -> bool:
+    """_is_newer on already-parsed timestamps."""
+    if ta is None:
         return False
-    if db is None:
+    if tb is None:
         return True
-    return da > db
+    return ta > tb
 
 
 def _iter_lon_lat(coords: Any):
@@ -117,67 +129,160 @@ def _geom_bbox_signature(event: Dict[str, Any]) -> Optional[str]:
     return f"{lon_min:.4f},{lat_min:.4f},{lon_max:.4f},{lat_max:.4f}"
 
 
+def _json_loads(data: bytes) -> Any:
+    """Decode JSON bytes with orjson when installed, else the stdlib json module."""
+    return _orjson.loads(data) if _orjson is not None else json.loads(data)
+
+
+def _json_dumps(obj: Any, pretty: bool = False) -> bytes:
+    """Encode as UTF-8 JSON bytes, compact unless `pretty` (orjson when installed)."""
+    if _orjson is not None:
+        return _orjson.dumps(obj, option=_orjson.OPT_INDENT_2 if pretty else 0)
+    if pretty:
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _env_pretty_state() -> bool:
+    """DISASTER_ALERTS_STATE_PRETTY=1 writes indented state.json (for debugging)."""
+    return os.environ.get("DISASTER_ALERTS_STATE_PRETTY") == "1"
+
+
+def _event_key(event: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+    """(provider, dedup id); the id is None when the event has no id."""
+    provider = str(event.get("provider") or "").strip() or "unknown"
+    base_id = str(event.get("id") or "").strip()
+    if not base_id:
+        return provider, None
+    sig = _geom_bbox_signature(event)
+    return provider, (f"{base_id}|{sig}" if sig else base_id)
+
+
 # --------------------------- core types ---------------------------
 
+# state.log is folded into state.json once it grows past this size.
+LOG_COMPACT_BYTES = 1 << 20
+
 DEFAULT_LRU_LIMIT = 5000
 
 
 def _env_lru_limit() -> int:
     """Read current env at runtime for testability (monkeypatch-friendly)."""
+    return _parse_lru_limit(os.environ.get("DISASTER_ALERTS_STATE_LRU"))
+
+
+@functools.lru_cache(maxsize=8)
+def _parse_lru_limit(raw: Optional[str]) -> int:
+    # Keyed on the raw env string, so a changed value is still picked up.
+    if raw is None:
+        return DEFAULT_LRU_LIMIT
     try:
-        return int(os.environ.get("DISASTER_ALERTS_STATE_LRU", str(DEFAULT_LRU_LIMIT)))
-    except Exception:
+        return int(raw)
+    except ValueError:
         return DEFAULT_LRU_LIMIT
 
 
-@dataclass
+@dataclass(slots=True)
 class _ProviderState:
-    ids: List[str] = field(default_factory=list)  # most recent first
+    # LRU of seen ids, most recent first; keys only, values unused.
+    ids: "OrderedDict[str, None]" = field(default_factory=OrderedDict)
     last_updated: Optional[str] = None  # ISO8601 string (UTC preferred)
+    # (last_updated, parsed) so the watermark is parsed once, not per comparison.
+    _last_updated_parsed: Tuple[Optional[str], Optional[float]] = field(
+        default=(None, None), init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self) -> None:
+        if not isinstance(self.ids, OrderedDict):
+            self.ids = OrderedDict.fromkeys(self.ids)  # drop duplicates, keep order
+
+    def __contains__(self, eid: str) -> bool:
+        return eid in self.ids
 
     def add_id(self, eid: str, lru_limit: int) -> None:
         """Move eid to front; cap by lru_limit."""
         if not eid:
             return
-        if self.ids and self.ids[0] == eid:
+        ids = self.ids
+        if eid not in ids:
+            ids[eid] = None
+        ids.move_to_end(eid, last=False)
+        while len(ids) > lru_limit:
+            ids.popitem(last=True)
+
+    def last_updated_ts(self) -> Optional[float]:
+        """Parsed `last_updated`, re-parsed only when the string changes."""
+        raw, parsed = self._last_updated_parsed
+        if raw != self.last_updated:
+            parsed = _parse_iso8601(self.last_updated)
+            self._last_updated_parsed = (self.last_updated, parsed)
+        return parsed
+
+    def consider_updated(
+        self, updated: Optional[str], parsed: Optional[float] = None
+    ) -> None:
+        """Advance watermark if `updated` is newer (`parsed`: its pre-parsed value)."""
+        if not updated:
             return
-        try:
-            self.ids.remove(eid)
-        except ValueError:
-            pass
-        self.ids.insert(0, eid)
-        if len(self.ids) > lru_limit:
-            del self.ids[lru_limit:]
-
-    def consider_updated(self, updated: Optional[str]) -> None:
-        """Advance watermark if `updated` is newer."""
-        if updated and _is_newer(updated, self.last_updated):
+        if parsed is None:
+            parsed = _parse_iso8601(updated)
+        if _is_newer_parsed(parsed, self.last_updated_ts()):
             self.last_updated = updated
+            self._last_updated_parsed = (updated, parsed)
 
 
-@dataclass
+@dataclass(slots=True)
 class State:
+    """
+    Dedup state, persisted in two files:
+
+      state.json  snapshot (ids LRU + watermark per provider), atomically rewritten
+      state.log   JSON lines of events notified since the last snapshot
+
+    load() reads the snapshot and replays the log on top of it. compact() folds
+    the log into a new snapshot; the pipeline calls it at the end of each run,
+    so state.json is current between runs and the log never outlives one.
+    """
+
     path: Path
     version: int = 1
-    providers: Dict[str, _ProviderState] = field(default_factory=dict)
+    # defaultdict: indexing an unseen provider creates its empty state
+    providers: Dict[str, _ProviderState] = field(
+        default_factory=lambda: defaultdict(_ProviderState)
+    )
     lru_limit: int = field(default_factory=_env_lru_limit)
 
+    def __post_init__(self) -> None:
+        if not isinstance(self.providers, defaultdict):
+            self.providers = defaultdict(_ProviderState, self.providers)
+
     # ---------------------- construction ----------------------
 
+    @property
+    def log_path(self) -> Path:
+        """Append-only sidecar of notified events not yet folded into state.json."""
+        return self.path.with_suffix(".log")
+
     @classmethod
     def load(cls, path: Path) -> "State":
         """
-        Load state from JSON file. If missing or corrupt, return an empty state.
+        Load state from JSON file, then replay the append log (see append_events).
+        If missing or corrupt, start from an empty state.
         Ensures parent directory exists.
         """
+        state = cls._load_snapshot(path)
+        state._replay_log()
+        return state
+
+    @classmethod
+    def _load_snapshot(cls, path: Path) -> "State":
         path.parent.mkdir(parents=True, exist_ok=True)
         if not path.exists():
             log.debug("State not found at %s; starting fresh", path)
             return cls(path=path)
 
         try:
-            raw = path.read_text(encoding="utf-8")
-            data = json.loads(raw)
+            data = _json_loads(path.read_bytes())
         except Exception:
             # Corrupt file; back it up once and start fresh
             try:
@@ -206,39 +311,48 @@ class State:
                 last_updated = obj.get("last_updated")
                 if not isinstance(last_updated, str):
                     last_updated = None
-                providers[name] = _ProviderState(ids=ids, last_updated=last_updated)
+                providers[name] = _ProviderState(
+                    ids=OrderedDict.fromkeys(ids), last_updated=last_updated
+                )
 
         lru_limit = int(data.get("lru_limit", _env_lru_limit()))
         return cls(path=path, version=version, providers=providers, lru_limit=lru_limit)
 
-    # ---------------------- query / update ----------------------
+    def _replay_log(self) -> None:
+        try:
+            raw = self.log_path.read_bytes()
+        except FileNotFoundError:
+            return
+        for line in raw.splitlines():
+            try:
+                rec = _json_loads(line)
+            except ValueError:
+                continue  # e.g. a torn final line from an interrupted append
+            if not isinstance(rec, dict) or not isinstance(rec.get("id"), str):
+                continue
+            provider = rec.get("provider")
+            ps = self.providers[provider if isinstance(provider, str) else "unknown"]
+            ps.add_id(rec["id"], self.lru_limit)
+            updated = rec.get("updated")
+            if isinstance(updated, str):
+                ps.consider_updated(updated)
 
-    def _prov(self, name: str) -> _ProviderState:
-        ps = self.providers.get(name)
-        if ps is None:
-            ps = _ProviderState()
-            self.providers[name] = ps
-        return ps
+    # ---------------------- query / update ----------------------
 
     def is_new(self, event: Dict[str, Any]) -> bool:
         """
         Return True if event has not been seen before.
 
         Criteria:
-          1) Event id + geometry bbox signature not in provider LRU list
+          1) Event id + geometry bbox signature not in provider LRU
           2) If geometry is missing/unusable, fall back to plain id
           3) Watermark is advisory only; we still check ids to allow late arrivals
         """
-        provider = str(event.get("provider") or "").strip() or "unknown"
-        base_id = str(event.get("id") or "").strip()
-        if not base_id:
+        provider, eid = _event_key(event)
+        if eid is None:
             # If an event has no id, treat as notifiable (cannot dedup safely)
             return True
-
-        sig = _geom_bbox_signature(event)
-        eid = f"{base_id}|{sig}" if sig else base_id
-
-        return eid not in self._prov(provider).ids
+        return eid not in self.providers[provider]
 
     def update_with(self, events: List[Dict[str, Any]]) -> None:
         """
@@ -246,28 +360,26 @@ class State:
         - Adds each event id + geometry bbox signature to provider LRU
         - Advances provider last_updated to the max 'updated' in the batch
         """
-        per_provider_max_updated: Dict[str, Optional[str]] = {}
+        # provider -> (updated string, parsed) of the newest event in the batch
+        per_provider_max_updated: Dict[str, Tuple[str, float]] = {}
         for e in events:
-            provider = str(e.get("provider") or "").strip() or "unknown"
-            base_id = str(e.get("id") or "").strip()
-            if not base_id:
+            provider, eid = _event_key(e)
+            if eid is None:
                 # Cannot track dedup for events without ids
                 continue
-
-            sig = _geom_bbox_signature(e)
-            eid = f"{base_id}|{sig}" if sig else base_id
             updated = e.get("updated") if isinstance(e.get("updated"), str) else None
 
-            self._prov(provider).add_id(eid, self.lru_limit)
+            self.providers[provider].add_id(eid, self.lru_limit)
 
+            parsed = _parse_iso8601(updated)
+            if parsed is None:
+                continue
             prev = per_provider_max_updated.get(provider)
-            per_provider_max_updated[provider] = (
-                updated if _is_newer(updated, prev) else prev
-            )
+            if prev is None or parsed > prev[1]:
+                per_provider_max_updated[provider] = (updated, parsed)
 
-        for provider, new_max in per_provider_max_updated.items():
-            if new_max:
-                self._prov(provider).consider_updated(new_max)
+        for provider, (new_max, parsed) in per_provider_max_updated.items():
+            self.providers[provider].consider_updated(new_max, parsed)
 
     # ---------------------- persistence ----------------------
 
@@ -277,7 +389,7 @@ class State:
             "lru_limit": self.lru_limit,
             "providers": {
                 name: {
-                    "ids": ps.ids,
+                    "ids": list(ps.ids),
                     "last_updated": ps.last_updated,
                 }
                 for name, ps in self.providers.items()
@@ -286,18 +398,69 @@ class State:
 
     def save(self) -> None:
         """
-        Atomically write state JSON:
+        Atomically write state JSON (compact; indented with
+        DISASTER_ALERTS_STATE_PRETTY=1):
           1) write to temp file in same dir
           2) flush to disk
           3) replace target with os.replace
+          4) remove the append log (its entries are now in state.json)
         """
         tmp = self.path.with_suffix(".json.tmp")
-        data = json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+        data = memoryview(_json_dumps(self.to_dict(), pretty=_env_pretty_state()))
 
         # Write & flush
-        with open(tmp, "w", encoding="utf-8") as fh:
-            fh.write(data)
-            fh.flush()
-            os.fsync(fh.fileno())
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            while data:
+                data = data[os.write(fd, data) :]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
         # Atomic replace
         os.replace(tmp, self.path)
+        self.log_path.unlink(missing_ok=True)
+
+    def append_events(self, events: List[Dict[str, Any]]) -> None:
+        """
+        Like update_with() + save(), but only appends one JSON line per event to
+        the log instead of rewriting state.json. The log is compacted into
+        state.json once it exceeds LOG_COMPACT_BYTES, and by the pipeline at
+        the end of every run.
+        """
+        self.update_with(events)
+        lines: List[bytes] = []
+        for e in events:
+            provider, eid = _event_key(e)
+            if eid is None:
+                continue
+            updated = e.get("updated") if isinstance(e.get("updated"), str) else None
+            rec = {"provider": provider, "id": eid, "updated": updated}
+            lines.append(_json_dumps(rec) + b"\n")
+        if not lines:
+            return
+        with open(self.log_path, "ab+") as fh:
+            # Terminate a torn final line (interrupted append) so the first new
+            # record isn't glued onto it and lost on replay.
+            if fh.seek(0, os.SEEK_END) > 0:
+                fh.seek(-1, os.SEEK_END)
+                if fh.read(1) != b"\n":
+                    lines.insert(0, b"\n")
+            fh.write(b"".join(lines))
+            fh.flush()
+            os.fsync(fh.fileno())
+            size = fh.tell()
+        if size > LOG_COMPACT_BYTES:
+            self.compact()
+
+    def compact(self) -> None:
+        """
+        Fold the append log into state.json (atomic rewrite, then drop the log).
+        No-op when there is no pending log.
+        """
+        try:
+            if self.log_path.stat().st_size == 0:
+                self.log_path.unlink(missing_ok=True)
+                return
+        except FileNotFoundError:
+            return
+        self.save()
@@ -2,10 +2,12 @@ from __future__ import annotations
 
 import os
 from pathlib import Path
-from typing import Callable, Dict, List, Optional
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Tuple
 
 import pytest
 
+from disaster_alerts.providers import REGISTRY
 from disaster_alerts.settings import (
     AppConfig,
     EmailConfig,
@@ -15,6 +17,7 @@ from disaster_alerts.settings import (
     Settings,
     Thresholds,
 )
+from disaster_alerts.state import State
 
 # --------------------------- temp repo layout ---------------------------
 
@@ -28,46 +31,90 @@ def tmp_repo(tmp_path: Path) -> Path:
     return tmp_path
 
 
+# --------------------------- State ---------------------------
+
+
+@pytest.fixture(scope="session")
+def state_dir(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    return tmp_path_factory.mktemp("state")
+
+
+@pytest.fixture
+def state(state_dir: Path) -> State:
+    """Fresh empty State that is never loaded from disk (don't save() it)."""
+    return State(path=state_dir / "state.json")
+
+
 # --------------------------- Settings factory ---------------------------
 
 
+def _paths_for(root: Path) -> Paths:
+    data_dir = root / "data"
+    return Paths(
+        root=root,
+        config_dir=root / "config",
+        data_dir=data_dir,
+        logs_dir=root / "logs",
+        state_file=data_dir / "state.json",
+    )
+
+
+@pytest.fixture
+def paths(tmp_repo: Path) -> Paths:
+    """Paths for tmp_repo, built once per test and shared by its Settings."""
+    return _paths_for(tmp_repo)
+
+
+def _make_settings(
+    paths: Paths,
+    recipients: Optional[Dict[str, List[str]]] = None,
+    enable_nws: bool = True,
+    enable_usgs: bool = True,
+    aoi: Optional[dict] = None,
+    log_level: str = "ERROR",
+    no_html: bool = False,
+) -> Settings:
+    app = AppConfig(
+        log_level=log_level,
+        aoi=aoi,
+        no_html=no_html,
+        providers=ProvidersConfig(nws=enable_nws, usgs=enable_usgs),
+    )
+    thresholds = Thresholds()
+    rcpts = Recipients.from_raw(recipients or {"default": ["alerts@example.com"]})
+    email = EmailConfig(user="sender@example.com", app_password="test-token")
+    return Settings(
+        paths=paths, app=app, thresholds=thresholds, recipients=rcpts, email=email
+    )
+
+
 @pytest.fixture
 def settings_factory(
-    tmp_repo: Path, monkeypatch: pytest.MonkeyPatch
+    tmp_repo: Path, paths: Paths, monkeypatch: pytest.MonkeyPatch
 ) -> Callable[..., Settings]:
     """Build Settings rooted at tmp_repo without reading real YAML/.env."""
     monkeypatch.setenv("DISASTER_ALERTS_ROOT", str(tmp_repo))
     monkeypatch.setenv("DISASTER_ALERTS_STATE_LRU", "128")  # speed up state churn
 
-    def _build(
-        recipients: Optional[Dict[str, List[str]]] = None,
-        enable_nws: bool = True,
-        enable_usgs: bool = True,
-        aoi: Optional[dict] = None,
-        log_level: str = "ERROR",
-    ) -> Settings:
-        paths = Paths(
-            root=tmp_repo,
-            config_dir=tmp_repo / "config",
-            data_dir=tmp_repo / "data",
-            logs_dir=tmp_repo / "logs",
-            state_file=tmp_repo / "data" / "state.json",
-        )
-        app = AppConfig(
-            log_level=log_level,
-            aoi=aoi,
-            providers=ProvidersConfig(nws=enable_nws, usgs=enable_usgs),
-        )
-        thresholds = Thresholds()
-        rcpts = Recipients.from_raw(recipients or {"default": ["alerts@example.com"]})
-        email = EmailConfig(user="sender@example.com", app_password="test-token")
-        return Settings(
-            paths=paths, app=app, thresholds=thresholds, recipients=rcpts, email=email
-        )
+    def _build(**kwargs: Any) -> Settings:
+        return _make_settings(paths, **kwargs)
 
     return _build
 
 
+@pytest.fixture
+def minimal_settings(settings_factory: Callable[..., Settings]) -> Settings:
+    """Default Settings for unit tests that only need a valid object."""
+    return settings_factory(log_level="INFO")
+
+
+@pytest.fixture(scope="module")
+def module_settings(tmp_path_factory: pytest.TempPathFactory) -> Settings:
+    """Like minimal_settings, but shared by a module's tests (treat as read-only)."""
+    root = tmp_path_factory.mktemp("settings")
+    return _make_settings(_paths_for(root), log_level="INFO")
+
+
 # --------------------------- Network & SMTP hardening ---------------------------
 
 
@@ -81,7 +128,13 @@ def block_network(monkeypatch: pytest.MonkeyPatch):
             "Network access disabled in tests. Monkeypatch provider HTTP calls."
         )
 
+    def _offline(self, method, url, *args, **kwargs):
+        # Session traffic (providers.common) sees an unreachable host, which
+        # get_json handles like any other connection failure.
+        raise requests.ConnectionError(f"Network access disabled in tests: {url}")
+
     monkeypatch.setattr(requests, "get", _nope)
+    monkeypatch.setattr(requests.Session, "request", _offline)
 
 
 @pytest.fixture(autouse=True)
@@ -116,7 +169,8 @@ def stub_yagmail(monkeypatch: pytest.MonkeyPatch):
         def send(self, *a, **kw):
             return None
 
-    monkeypatch.setattr("disaster_alerts.email.yagmail.SMTP", DummySMTP, raising=False)
+    # email.py imports yagmail lazily inside the send path; patch it at the source.
+    monkeypatch.setattr("yagmail.SMTP", DummySMTP, raising=False)
 
 
 # --------------------------- Helpers to monkeypatch providers ---------------------------
@@ -124,25 +178,139 @@ def stub_yagmail(monkeypatch: pytest.MonkeyPatch):
 
 @pytest.fixture
 def patch_nws(monkeypatch: pytest.MonkeyPatch):
-    """Return a function to set NWS fetch_events to a custom list."""
+    """Return a function to register a fake NWS fetcher returning a custom list."""
 
     def _set(events: List[dict]):
-        monkeypatch.setattr(
-            "disaster_alerts.providers.nws.fetch_events", lambda s: events, raising=True
-        )
+        monkeypatch.setitem(REGISTRY, "nws", lambda s: events)
 
     return _set
 
 
 @pytest.fixture
 def patch_usgs(monkeypatch: pytest.MonkeyPatch):
-    """Return a function to set USGS fetch_events to a custom list."""
+    """Return a function to register a fake USGS fetcher returning a custom list."""
 
     def _set(events: List[dict]):
-        monkeypatch.setattr(
-            "disaster_alerts.providers.usgs.fetch_events",
-            lambda s: events,
-            raising=True,
-        )
+        monkeypatch.setitem(REGISTRY, "usgs", lambda s: events)
 
     return _set
+
+
+# --------------------------- Shared pipeline fixtures ---------------------------
+
+Event = Dict[str, Any]
+
+# Built once at import; read-only so no test can alter what another one sees.
+# Fakes hand out dict() copies, since the pipeline adds keys in place.
+
+# First poll: one USGS quake (default group) and one NWS alert (ops group).
+BATCH_1: Tuple[Mapping[str, Any], ...] = (
+    MappingProxyType(
+        {
+            "id": "usgs-001",
+            "provider": "usgs",
+            "updated": "2025-11-03T10:00:00Z",
+            "title": "M4.6 near Testville",
+            "severity": "Moderate",
+            "link": "https://earthquake.example/usgs-001",
+            "geometry": {"type": "Point", "coordinates": [-120.0, 35.0, 8.0]},
+            "properties": {"mag": 4.6, "depth_km": 8.0},
+            "routing_key": "default",
+        }
+    ),
+    MappingProxyType(
+        {
+            "id": "nws-xyz",
+            "provider": "nws",
+            "updated": "2025-11-03T10:05:00Z",
+            "title": "Severe Thunderstorm Warning",
+            "severity": "Severe",
+            "link": "https://alerts.example/nws-xyz",
+            "geometry": None,
+            "properties": {"event": "Thunderstorm"},
+            "routing_key": "ops",
+        }
+    ),
+)
+
+# Second poll: the same quake again plus one new quake.
+BATCH_2: Tuple[Mapping[str, Any], ...] = (
+    MappingProxyType(
+        {
+            "id": "usgs-001",
+            "provider": "usgs",
+            "updated": "2025-11-03T10:00:00Z",
+            "title": "M4.6 near Testville",
+            "severity": "Moderate",
+            "link": "https://earthquake.example/usgs-001",
+            "geometry": {"type": "Point", "coordinates": [-120.0, 35.0, 8.0]},
+            "properties": {"mag": 4.6, "depth_km": 8.0},
+            "routing_key": "default",
+        }
+    ),
+    MappingProxyType(
+        {
+            "id": "usgs-002",
+            "provider": "usgs",
+            "updated": "2025-11-03T10:20:00Z",
+            "title": "M3.8 near Sampletown",
+            "severity": "Light",
+            "link": "https://earthquake.example/usgs-002",
+            "geometry": {"type": "Point", "coordinates": [-121.0, 36.0, 5.0]},
+            "properties": {"mag": 3.8, "depth_km": 5.0},
+            "routing_key": "default",
+        }
+    ),
+)
+
+
+@pytest.fixture(scope="session")
+def batch1() -> Tuple[Mapping[str, Any], ...]:
+    return BATCH_1
+
+
+@pytest.fixture(scope="session")
+def batch2() -> Tuple[Mapping[str, Any], ...]:
+    return BATCH_2
+
+
+@pytest.fixture
+def patched_providers(
+    monkeypatch: pytest.MonkeyPatch,
+    batch1: Tuple[Mapping[str, Any], ...],
+    batch2: Tuple[Mapping[str, Any], ...],
+) -> None:
+    """Serve batch1 on the first pipeline run, batch2 on the second, then nothing."""
+    def _feed(provider: str) -> Iterator[List[Event]]:
+        return iter(
+            [
+                [dict(e) for e in batch if e["provider"] == provider]
+                for batch in (batch1, batch2)
+            ]
+        )
+
+    usgs_feed = _feed("usgs")
+    nws_feed = _feed("nws")
+    monkeypatch.setitem(REGISTRY, "usgs", lambda _s: next(usgs_feed, []))
+    monkeypatch.setitem(REGISTRY, "nws", lambda _s: next(nws_feed, []))
+
+
+@pytest.fixture
+def sent_emails(monkeypatch: pytest.MonkeyPatch) -> List[Dict[str, Any]]:
+    """Capture email.send calls instead of sending."""
+    from disaster_alerts import email as email_mod
+
+    sent: List[Dict[str, Any]] = []
+
+    def fake_send(_settings, recipients, subject, html_body, text_body, yag=None):
+        sent.append(
+            {
+                "recipients": tuple(recipients),
+                "subject": subject,
+                "html": html_body,
+                "text": text_body,
+            }
+        )
+
+    monkeypatch.setattr(email_mod, "send", fake_send)
+    return sent
@@ -1,52 +1,176 @@
 # tests/test_email.py
+import pytest
+
 from disaster_alerts.email import build_message
-from disaster_alerts.settings import Settings, Thresholds, AppConfig, ProvidersConfig, Paths, EmailConfig
-
-
-class DummySettings(Settings):
-    @classmethod
-    def minimal(cls) -> "Settings":
-        root = Paths(
-            root=".",
-            config_dir=".",
-            data_dir=".",
-            logs_dir=".",
-            state_file="./data/state.json",
-        )
-        app = AppConfig(log_level="INFO", aoi=None, providers=ProvidersConfig(nws=True, usgs=True))
-        return cls(paths=root, app=app, thresholds=Thresholds(), recipients={}, email=EmailConfig(user="u@e.com", app_password="x"))
-
-
-def test_build_message_shapes_html_and_text():
-    settings = DummySettings.minimal()
-    events = [
-        {
-            "id": "e1",
-            "provider": "usgs",
-            "title": "M 4.6 - near Somewhere",
-            "severity": "Moderate",
-            "updated": "2025-11-03T10:00:00Z",
-            "link": "https://example.org/e1",
-            "geometry": {"type": "Point", "coordinates": [-120, 35, 5]},
-            "properties": {"mag": 4.6, "depth_km": 5.0},
-        },
-        {
-            "id": "e2",
-            "provider": "nws",
-            "title": "Severe Thunderstorm Warning",
-            "severity": "Severe",
-            "updated": "2025-11-03T10:05:00Z",
-            "link": "",
-            "geometry": None,
-            "properties": {"event": "Thunderstorm"},
-        },
-    ]
-
-    subject, html_body, text_body = build_message(settings, events, group_key="default")
 
+
+SAMPLE_EVENTS = (
+    {
+        "id": "e1",
+        "provider": "usgs",
+        "title": "M 4.6 - near Somewhere",
+        "severity": "Moderate",
+        "updated": "2025-11-03T10:00:00Z",
+        "link": "https://example.org/e1",
+        "geometry": {"type": "Point", "coordinates": [-120, 35, 5]},
+        "properties": {"mag": 4.6, "depth_km": 5.0},
+    },
+    {
+        "id": "e2",
+        "provider": "nws",
+        "title": "Severe Thunderstorm Warning",
+        "severity": "Severe",
+        "updated": "2025-11-03T10:05:00Z",
+        "link": "",
+        "geometry": None,
+        "properties": {"event": "Thunderstorm"},
+    },
+)
+
+
+@pytest.fixture(scope="module")
+def rendered_message(module_settings):
+    """(subject, html_body, text_body) for SAMPLE_EVENTS, rendered once per module."""
+    events = [dict(e) for e in SAMPLE_EVENTS]
+    return build_message(module_settings, events, group_key="default")
+
+
+def test_subject(rendered_message):
+    subject, _, _ = rendered_message
     assert "[disaster-alerts]" in subject
     assert "new event" in subject
+
+
+def test_html_table(rendered_message):
     # HTML contains a table with rows
+    _, html_body, _ = rendered_message
     assert "<table" in html_body and "<tr>" in html_body
+
+
+def test_text_ids(rendered_message):
     # Text body lists items with ids
+    _, _, text_body = rendered_message
     assert "e1" in text_body and "e2" in text_body
+
+
+def test_wkt_detail_fetched_once_per_url(monkeypatch, tmp_path, minimal_settings):
+    from disaster_alerts import email as email_mod
+
+    calls = []
+
+    def fake_get_json(url, *a, **kw):
+        calls.append(url)
+        return {"type": "Feature", "geometry": {"type": "Point", "coordinates": [1, 2]}}
+
+    monkeypatch.setattr(email_mod, "get_json", fake_get_json)
+    email_mod._clear_wkt_cache()
+
+    settings = minimal_settings
+    settings.paths.data_dir = tmp_path
+    ev = {
+        "id": "e1",
+        "provider": "nws",
+        "title": "Flood Warning",
+        "link": "https://api.weather.gov/alerts/e1",
+        "properties": {"event": "Flood Warning"},
+    }
+    other = dict(ev, id="e2", title="Flood Warning (updated)")
+    _, html_body, text_body = build_message(settings, [ev, other], group_key="default")
+
+    assert calls == ["https://api.weather.gov/alerts/e1"]
+    assert "POINT (1.0 2.0)" in text_body and "POINT (1.0 2.0)" in html_body
+
+    # next run: in-memory cache is reset, the on-disk entry is reused
+    email_mod._clear_wkt_cache()
+    _, _, text_body = build_message(settings, [ev], group_key="default")
+    assert len(calls) == 1
+    assert "POINT (1.0 2.0)" in text_body
+
+
+def test_wkt_disk_cache_prunes_expired_entries(tmp_path, minimal_settings):
+    import os
+
+    from disaster_alerts import email as email_mod
+
+    settings = minimal_settings
+    settings.paths.data_dir = tmp_path
+    disk = email_mod._WKTDiskCache.for_settings(settings)
+    disk.put("https://api.weather.gov/alerts/old", "POINT (1.0 2.0)")
+    disk.put("https://api.weather.gov/alerts/new", None)
+    old = disk._path("https://api.weather.gov/alerts/old")
+    stale = old.stat().st_mtime - disk.ttl_s - 1
+    os.utime(old, (stale, stale))
+
+    email_mod._clear_wkt_cache(settings)
+
+    assert not old.exists()
+    assert disk._path("https://api.weather.gov/alerts/new").exists()
+
+
+def test_send_many_reuses_one_connection(monkeypatch, minimal_settings):
+    import yagmail
+
+    opened = []
+    delivered = []
+
+    class CountingSMTP:
+        def __init__(self, user, app_password):
+            opened.append(user)
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, exc_type, exc, tb):
+            return False
+
+        def send(self, to, subject, contents):
+            delivered.append((tuple(to), subject))
+
+    monkeypatch.setattr(yagmail, "SMTP", CountingSMTP)
+
+    from disaster_alerts.email import send_many
+
+    settings = minimal_settings
+    send_many(
+        settings,
+        [
+            (["a@example.com"], "s1", "<p>1</p>", "1"),
+            (["b@example.com"], "s2", "<p>2</p>", "2"),
+        ],
+    )
+
+    assert opened == [settings.email.user]
+    assert delivered == [(("a@example.com",), "s1"), (("b@example.com",), "s2")]
+
+
+def test_wkt_prefers_inline_geometry_without_fetch(monkeypatch, minimal_settings):
+    from disaster_alerts import email as email_mod
+
+    def fail_get_json(url, *a, **kw):
+        raise AssertionError(f"unexpected fetch of {url}")
+
+    monkeypatch.setattr(email_mod, "get_json", fail_get_json)
+    email_mod._clear_wkt_cache()
+
+    settings = minimal_settings
+    ev = {
+        "id": "us1",
+        "provider": "usgs",
+        "title": "M 5.0",
+        "link": "https://earthquake.usgs.gov/earthquakes/eventpage/us1",
+        "geometry": {"type": "Point", "coordinates": [-120, 35, 5]},
+        "properties": {"mag": 5.0},
+    }
+    _, _, text_body = build_message(settings, [ev], group_key="default")
+    assert "WKT: POINT (-120.0 35.0)" in text_body
+
+
+def test_importing_package_does_not_import_yagmail():
+    import subprocess
+    import sys
+
+    code = "import sys, disaster_alerts.cli; print('yagmail' in sys.modules)"
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert out.stdout.strip() == "False"
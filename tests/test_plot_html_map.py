@@ -54,3 +54,93 @@ def test_add_aoi_to_events_storm_uses_first_affected_zone(monkeypatch, tmp_path:
     out = map_mod._add_aoi_to_events(events, str(tmp_path))
     assert calls == ["https://api.weather.gov/zones/forecast/CAZ041"]
     assert out[0]["aoi_polygon"] == "geom"
+
+
+def test_add_aoi_to_events_resolves_shared_links_once(monkeypatch, tmp_path: Path):
+    calls: list[str] = []
+
+    def fake_bbox_to_geometry(link: str, _file_dir: str):
+        calls.append(link)
+        return f"geom:{link[-6:]}", (1, 2, 3, 4), "centroid"
+
+    monkeypatch.setattr(map_mod, "_bbox_to_geometry", fake_bbox_to_geometry)
+
+    zones = [
+        "https://api.weather.gov/zones/forecast/CAZ041",
+        "https://api.weather.gov/zones/forecast/CAZ041",
+        "https://api.weather.gov/zones/forecast/CAZ042",
+    ]
+    events = [
+        {
+            "id": f"nws-{i}",
+            "provider": "nws",
+            "properties": {"event": "Winter Storm Warning", "affectedZones": [z]},
+        }
+        for i, z in enumerate(zones)
+    ]
+    out = map_mod._add_aoi_to_events(events, str(tmp_path))
+    assert sorted(calls) == sorted(set(zones))
+    assert [e["aoi_polygon"] for e in out] == [
+        "geom:CAZ041",
+        "geom:CAZ041",
+        "geom:CAZ042",
+    ]
+
+
+def test_download_url_to_file_skips_rewrite_when_unchanged(monkeypatch, tmp_path: Path):
+    payload = b'{"type": "Point", "coordinates": [0, 0]}'
+
+    class FakeResp:
+        headers = {"Content-Type": "application/geo+json"}
+
+        def raise_for_status(self):
+            pass
+
+        def iter_content(self, chunk_size):
+            yield payload
+
+        def close(self):
+            pass
+
+    class FakeSession:
+        def get(self, url, headers=None, timeout=None, stream=False):
+            return FakeResp()
+
+    monkeypatch.setattr(map_mod, "_validate_remote_url", lambda _url: None)
+    monkeypatch.setattr(map_mod, "_SESSION", FakeSession())
+
+    url = "https://api.weather.gov/zones/forecast/CAZ041"
+    path = map_mod._download_url_to_file(url, tmp_path / "aoi.geojson")
+    assert path.read_bytes() == payload
+    first_inode = path.stat().st_ino
+
+    again = map_mod._download_url_to_file(url, tmp_path / "aoi.geojson")
+    assert again == path
+    assert again.stat().st_ino == first_inode  # not replaced
+    assert not list(tmp_path.glob("*.part"))
+
+
+def test_download_url_to_file_rejects_invalid_json(monkeypatch, tmp_path: Path):
+    class FakeResp:
+        headers = {"Content-Type": "application/geo+json"}
+
+        def raise_for_status(self):
+            pass
+
+        def iter_content(self, chunk_size):
+            yield b'{"type": "Point", "coordin'  # truncated upstream
+
+        def close(self):
+            pass
+
+    class FakeSession:
+        def get(self, url, headers=None, timeout=None, stream=False):
+            return FakeResp()
+
+    monkeypatch.setattr(map_mod, "_validate_remote_url", lambda _url: None)
+    monkeypatch.setattr(map_mod, "_SESSION", FakeSession())
+
+    url = "https://api.weather.gov/zones/forecast/CAZ041"
+    with pytest.raises(ValueError, match="Invalid JSON"):
+        map_mod._download_url_to_file(url, tmp_path / "aoi.geojson")
+    assert not list(tmp_path.iterdir())  # no file, sidecar or .part left behind
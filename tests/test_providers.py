@@ -1,29 +1,13 @@
 # tests/test_providers.py
-from datetime import datetime, timezone, timedelta
-
-import pytest
+import json
+from collections import OrderedDict
+from datetime import datetime, timezone
 
 from disaster_alerts.providers import nws as nws_mod
 from disaster_alerts.providers import usgs as usgs_mod
-from disaster_alerts.settings import Settings, Thresholds, AppConfig, ProvidersConfig, Paths, EmailConfig
-
-
-class DummySettings(Settings):
-    """Lightweight Settings for provider unit tests without reading files."""
-    @classmethod
-    def minimal(cls) -> "Settings":
-        root = Paths(
-            root=".",
-            config_dir=".",
-            data_dir=".",
-            logs_dir=".",
-            state_file="./data/state.json",
-        )
-        app = AppConfig(log_level="INFO", aoi=None, providers=ProvidersConfig(nws=True, usgs=True))
-        return cls(paths=root, app=app, thresholds=Thresholds(), recipients={}, email=EmailConfig())
 
 
-def test_nws_fetch_events_monkeypatched(monkeypatch):
+def test_nws_fetch_events_monkeypatched(monkeypatch, minimal_settings):
     # Sample NWS response (trimmed)
     sample = {
         "type": "FeatureCollection",
@@ -48,7 +32,7 @@ def test_nws_fetch_events_monkeypatched(monkeypatch):
 
     monkeypatch.setattr(nws_mod, "get_json", fake_get_json)
 
-    settings = DummySettings.minimal()
+    settings = minimal_settings
     events = nws_mod.fetch_events(settings)
 
     assert len(events) == 1
@@ -60,7 +44,7 @@ def test_nws_fetch_events_monkeypatched(monkeypatch):
     assert e["routing_key"] in {"severe", "default"}
 
 
-def test_usgs_fetch_events_monkeypatched(monkeypatch):
+def test_usgs_fetch_events_monkeypatched(monkeypatch, minimal_settings):
     now = datetime.now(timezone.utc)
     now_ms = int(now.timestamp() * 1000)
 
@@ -89,7 +73,7 @@ def test_usgs_fetch_events_monkeypatched(monkeypatch):
 
     monkeypatch.setattr(usgs_mod, "get_json", fake_get_json)
 
-    settings = DummySettings.minimal()
+    settings = minimal_settings
     events = usgs_mod.fetch_events(settings)
 
     assert len(events) == 1
@@ -99,3 +83,79 @@ def test_usgs_fetch_events_monkeypatched(monkeypatch):
     assert e["severity"] in {"Moderate", "Strong", "Major", "Great", "Light", "Minor"}  # bucketed
     assert "depth_km" in e["properties"]
     assert e["properties"]["depth_km"] == 8.0
+
+
+def test_get_json_sends_validators_and_reuses_body_on_304(monkeypatch):
+    from disaster_alerts.providers import common
+
+    class FakeResp:
+        def __init__(self, status, headers, body=None):
+            self.status_code = status
+            self.headers = headers
+            self.content = json.dumps(body).encode() if body is not None else b""
+
+    seen_headers = []
+    responses = [
+        FakeResp(200, {"Content-Type": "application/geo+json", "ETag": '"v1"'}, {"features": [1]}),
+        FakeResp(304, {}),
+    ]
+
+    class FakeSession:
+        def get(self, url, params=None, headers=None, timeout=None):
+            seen_headers.append(dict(headers or {}))
+            return responses.pop(0)
+
+    monkeypatch.setattr(common, "_ETAG_CACHE", OrderedDict())
+    monkeypatch.setattr(common, "_session", lambda _r, _b: FakeSession())
+
+    first = common.get_json("https://api.example/alerts")
+    assert first == {"features": [1]}
+    first["features"].append(2)  # callers may mutate what they get back
+    assert common.get_json("https://api.example/alerts") == {"features": [1]}
+    assert "If-None-Match" not in seen_headers[0]
+    assert seen_headers[1]["If-None-Match"] == '"v1"'
+
+
+def test_get_json_304_after_concurrent_eviction(monkeypatch):
+    from disaster_alerts.providers import common
+
+    class FakeResp:
+        def __init__(self, status, headers, content=b""):
+            self.status_code = status
+            self.headers = headers
+            self.content = content
+
+    cache = OrderedDict()
+    responses = [
+        FakeResp(200, {"Content-Type": "application/json", "ETag": '"v1"'}, b'{"a": 1}'),
+        FakeResp(304, {}),
+    ]
+
+    class FakeSession:
+        def get(self, url, params=None, headers=None, timeout=None):
+            if "If-None-Match" in (headers or {}):
+                cache.clear()  # another thread evicts the key mid-request
+            return responses.pop(0)
+
+    monkeypatch.setattr(common, "_ETAG_CACHE", cache)
+    monkeypatch.setattr(common, "_session", lambda _r, _b: FakeSession())
+
+    assert common.get_json("https://api.example/alerts") == {"a": 1}
+    assert common.get_json("https://api.example/alerts") == {"a": 1}
+
+
+def test_get_json_reads_user_agent_per_request(monkeypatch):
+    from disaster_alerts.providers import common
+
+    seen = []
+
+    class FakeSession:
+        def get(self, url, params=None, headers=None, timeout=None):
+            seen.append(headers["User-Agent"])
+            raise common.requests.ConnectionError("offline")
+
+    monkeypatch.setattr(common, "_session", lambda _r, _b: FakeSession())
+    monkeypatch.setenv("DISASTER_ALERTS_UA", "from-dotenv/1.0")  # set after import
+
+    assert common.get_json("https://api.example/alerts") == {}
+    assert seen == ["from-dotenv/1.0"]
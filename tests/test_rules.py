@@ -1,120 +1,226 @@
+import pytest
+
 from disaster_alerts.rules import filter_events
 from disaster_alerts.settings import EarthquakeThresholds, Thresholds, WeatherThresholds
 
+# Event fixtures are module-level tuples, built once at import. filter_events
+# never mutates its input, so tests pass list(...) views of them.
 
-def test_earthquake_threshold_min_mag():
-    thresholds = Thresholds(
-        earthquake=EarthquakeThresholds(min_magnitude=4.5, max_depth_km=700)
-    )
-    aoi = None
+_BOX_AOI = {
+    "type": "Polygon",
+    "coordinates": [
+        [[-122, 34], [-118, 34], [-118, 36], [-122, 36], [-122, 34]]  # simple box
+    ],
+}
 
-    events = [
-        {
-            "id": "eq1",
-            "provider": "usgs",
-            "geometry": {"type": "Point", "coordinates": [-120.0, 35.0, 5.0]},
-            "properties": {"mag": 4.6, "depth_km": 5.0},
-        },
-        {
-            "id": "eq2",
-            "provider": "usgs",
-            "geometry": {"type": "Point", "coordinates": [-120.0, 35.0, 5.0]},
-            "properties": {"mag": 4.4, "depth_km": 5.0},
+_EQ_MIN_MAG_EVENTS = (
+    {
+        "id": "eq1",
+        "provider": "usgs",
+        "geometry": {"type": "Point", "coordinates": [-120.0, 35.0, 5.0]},
+        "properties": {"mag": 4.6, "depth_km": 5.0},
+    },
+    {
+        "id": "eq2",
+        "provider": "usgs",
+        "geometry": {"type": "Point", "coordinates": [-120.0, 35.0, 5.0]},
+        "properties": {"mag": 4.4, "depth_km": 5.0},
+    },
+)
+
+_EQ_DEPTH_EVENTS = (
+    {
+        "id": "shallow",
+        "provider": "usgs",
+        "geometry": {"type": "Point", "coordinates": [-120.0, 35.0, 10.0]},
+        "properties": {"mag": 3.0, "depth_km": 10.0},
+    },
+    {
+        "id": "deep",
+        "provider": "usgs",
+        "geometry": {"type": "Point", "coordinates": [-120.0, 35.0, 400.0]},
+        "properties": {"mag": 6.0, "depth_km": 400.0},
+    },
+)
+
+_WEATHER_NO_NUMERICS_EVENTS = (
+    {
+        "id": "nws-no-numerics",
+        "provider": "nws",
+        "geometry": {
+            "type": "Polygon",
+            "coordinates": [[[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]],
         },
-    ]
+        "properties": {"event": "Severe Thunderstorm Warning"},
+    },
+)
 
-    out = filter_events(events, thresholds, aoi)
-    ids = {e["id"] for e in out}
-    assert "eq1" in ids and "eq2" not in ids
+_AOI_IN_OUT_EVENTS = (
+    {
+        "id": "in",
+        "provider": "usgs",
+        "geometry": {"type": "Point", "coordinates": [-120.0, 35.0, 5.0]},
+        "properties": {"mag": 3.0},
+    },
+    {
+        "id": "out",
+        "provider": "usgs",
+        "geometry": {"type": "Point", "coordinates": [-110.0, 35.0, 5.0]},
+        "properties": {"mag": 3.0},
+    },
+)
 
+_AOI_NO_GEOMETRY_EVENTS = (
+    {
+        "id": "nogeom",
+        "provider": "nws",
+        "geometry": None,
+        "properties": {"event": "Test Alert"},
+    },
+)
+
+
+CASES = [
+    pytest.param(
+        Thresholds(earthquake=EarthquakeThresholds(min_magnitude=4.5, max_depth_km=700)),
+        None,
+        _EQ_MIN_MAG_EVENTS,
+        {"eq1"},
+        id="earthquake_min_magnitude",
+    ),
+    pytest.param(
+        Thresholds(earthquake=EarthquakeThresholds(min_magnitude=0.0, max_depth_km=50)),
+        None,
+        _EQ_DEPTH_EVENTS,
+        {"shallow"},
+        id="earthquake_max_depth",
+    ),
+    # If weather values are absent, rules remain permissive (do not exclude)
+    pytest.param(
+        Thresholds(weather=WeatherThresholds(wind_gust_mps=20, rainfall_mm_hr=10)),
+        None,
+        _WEATHER_NO_NUMERICS_EVENTS,
+        {"nws-no-numerics"},
+        id="weather_permissive_when_values_missing",
+    ),
+    pytest.param(
+        Thresholds(),
+        _BOX_AOI,
+        _AOI_IN_OUT_EVENTS,
+        {"in"},
+        id="aoi_inclusion_and_exclusion",
+    ),
+    pytest.param(
+        Thresholds(),
+        _BOX_AOI,
+        _AOI_NO_GEOMETRY_EVENTS,
+        {"nogeom"},
+        id="aoi_missing_geometry_kept",
+    ),
+]
+
+
+@pytest.mark.parametrize("thresholds, aoi, events, expected_ids", CASES)
+def test_rules(thresholds, aoi, events, expected_ids):
+    ids = {e["id"] for e in filter_events(list(events), thresholds, aoi)}
+    assert ids == expected_ids
+
+
+def test_aoi_multipolygon_checks_each_polygon():
+    thresholds = Thresholds()
+    aoi = {
+        "type": "MultiPolygon",
+        "coordinates": [
+            [[[-122, 34], [-118, 34], [-118, 36], [-122, 36], [-122, 34]]],
+            [[[10, 40], [12, 40], [12, 42], [10, 42], [10, 40]]],
+        ],
+    }
 
-def test_earthquake_max_depth():
-    thresholds = Thresholds(
-        earthquake=EarthquakeThresholds(min_magnitude=0.0, max_depth_km=50)
-    )
-    aoi = None
+    def quake(eid, lon, lat):
+        return {
+            "id": eid,
+            "provider": "usgs",
+            "geometry": {"type": "Point", "coordinates": [lon, lat, 5.0]},
+            "properties": {"mag": 3.0},
+        }
 
     events = [
-        {
-            "id": "shallow",
-            "provider": "usgs",
-            "geometry": {"type": "Point", "coordinates": [-120.0, 35.0, 10.0]},
-            "properties": {"mag": 3.0, "depth_km": 10.0},
-        },
-        {
-            "id": "deep",
-            "provider": "usgs",
-            "geometry": {"type": "Point", "coordinates": [-120.0, 35.0, 400.0]},
-            "properties": {"mag": 6.0, "depth_km": 400.0},
-        },
+        quake("first", -120.0, 35.0),
+        quake("second", 11.0, 41.0),
+        quake("none", 0.0, 0.0),
     ]
-    out = filter_events(events, thresholds, aoi)
-    ids = {e["id"] for e in out}
-    assert "shallow" in ids and "deep" not in ids
+    ids = {e["id"] for e in filter_events(events, thresholds, aoi)}
+    assert ids == {"first", "second"}
 
 
-def test_weather_thresholds_permissive_when_values_missing():
-    # If weather values are absent, rules remain permissive (do not exclude)
-    thresholds = Thresholds(
-        weather=WeatherThresholds(wind_gust_mps=20, rainfall_mm_hr=10)
-    )
-    aoi = None
+@pytest.mark.parametrize("hole", [[], [[-121, 35]]], ids=["empty", "degenerate"])
+def test_aoi_empty_or_degenerate_hole_keeps_polygon(hole):
+    aoi = {"type": "Polygon", "coordinates": [_BOX_AOI["coordinates"][0], hole]}
+    ids = {e["id"] for e in filter_events(list(_AOI_IN_OUT_EVENTS), Thresholds(), aoi)}
+    assert ids == {"in"}
 
-    events = [
-        {
-            "id": "nws-no-numerics",
-            "provider": "nws",
-            "geometry": {
-                "type": "Polygon",
-                "coordinates": [[[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]],
-            },
-            "properties": {"event": "Severe Thunderstorm Warning"},
-        }
-    ]
-    out = filter_events(events, thresholds, aoi)
-    assert len(out) == 1 and out[0]["id"] == "nws-no-numerics"
 
+def test_aoi_shapely_and_ray_casting_agree_on_boundaries(monkeypatch):
+    pytest.importorskip("shapely")
+    from disaster_alerts import rules
 
-def test_aoi_polygon_inclusion_and_exclusion():
-    thresholds = Thresholds()
     aoi = {
         "type": "Polygon",
         "coordinates": [
-            [[-122, 34], [-118, 34], [-118, 36], [-122, 36], [-122, 34]]  # simple box
+            [[0, 0], [10, 0], [10, 10], [0, 10], [0, 0]],
+            [[4, 4], [6, 4], [6, 6], [4, 6], [4, 4]],  # hole
         ],
     }
-
-    inside = {
-        "id": "in",
-        "provider": "usgs",
-        "geometry": {"type": "Point", "coordinates": [-120.0, 35.0, 5.0]},
-        "properties": {"mag": 3.0},
+    points = {
+        "outer-vertex": (0.0, 0.0),
+        "far-vertex": (10.0, 10.0),
+        "bottom-edge": (5.0, 0.0),
+        "left-edge": (0.0, 5.0),
+        "top-edge": (5.0, 10.0),
+        "right-edge": (10.0, 5.0),
+        "hole-vertex": (4.0, 4.0),
+        "hole-edge": (5.0, 4.0),
+        "hole-far-edge": (6.0, 5.0),
+        "in-hole": (5.0, 5.0),
+        "interior": (1.0, 1.0),
+        "exterior": (20.0, 20.0),
     }
-    outside = {
-        "id": "out",
-        "provider": "usgs",
-        "geometry": {"type": "Point", "coordinates": [-110.0, 35.0, 5.0]},
-        "properties": {"mag": 3.0},
-    }
-
-    out = filter_events([inside, outside], thresholds, aoi)
-    ids = {e["id"] for e in out}
-    assert "in" in ids and "out" not in ids
+    events = [
+        {
+            "id": name,
+            "provider": "usgs",
+            "geometry": {"type": "Point", "coordinates": [x, y]},
+            "properties": {"mag": 3.0},
+        }
+        for name, (x, y) in points.items()
+    ]
 
+    def kept(min_edges):
+        monkeypatch.setattr(rules, "SHAPELY_MIN_EDGES", min_edges)
+        return {e["id"] for e in filter_events(list(events), Thresholds(), aoi)}
 
-def test_aoi_missing_geometry_kept():
-    thresholds = Thresholds()
-    aoi = {
-        "type": "Polygon",
-        "coordinates": [[[-122, 34], [-118, 34], [-118, 36], [-122, 36], [-122, 34]]],
-    }
+    assert kept(0) == kept(10**9)
+    assert {"interior", "exterior", "in-hole"} & kept(0) == {"interior"}
+    hits = rules._shapely_contains_many(aoi, [points["interior"], points["hole-edge"]])
+    assert hits == [True, None]
 
-    no_geom = {
-        "id": "nogeom",
-        "provider": "nws",
-        "geometry": None,
-        "properties": {"event": "Test Alert"},
-    }
 
-    out = filter_events([no_geom], thresholds, aoi)
-    assert len(out) == 1 and out[0]["id"] == "nogeom"
+def test_weather_include_exclude_events_substring_match():
+    thresholds = Thresholds(
+        weather=WeatherThresholds(
+            include_events=["Flood", "warning"], exclude_events=["coastal"]
+        )
+    )
+    events = [
+        {
+            "id": f"nws-{i}",
+            "provider": "nws",
+            "geometry": None,
+            "properties": {"event": ev},
+        }
+        for i, ev in enumerate(
+            ["Flash Flood Warning", "Coastal Flood Advisory", "Heat Advisory"]
+        )
+    ]
+    ids = [e["id"] for e in filter_events(events, thresholds, None)]
+    assert ids == ["nws-0"]
@@ -11,9 +11,8 @@ def test_state_load_empty(tmp_path: Path):
     assert s.path == state_path
 
 
-def test_is_new_and_update_with(tmp_path: Path):
-    state_path = tmp_path / "state.json"
-    s = State.load(state_path)
+def test_is_new_and_update_with(state: State):
+    s = state
 
     ev1 = {"id": "A1", "provider": "usgs", "updated": "2025-01-01T00:00:00Z"}
     ev2 = {"id": "A2", "provider": "usgs", "updated": "2025-01-01T00:05:00Z"}
@@ -61,5 +60,51 @@ def test_lru_limit(tmp_path: Path, monkeypatch):
     # Add 4 ids for same provider; oldest should drop
     events = [{"id": f"E{i}", "provider": "usgs"} for i in range(4)]
     s.update_with(events)
-    ids = s.providers["usgs"].ids
+    ids = list(s.providers["usgs"].ids)
     assert ids == ["E3", "E2", "E1"]  # E0 evicted
+
+
+def test_append_events_replay_and_compact(tmp_path: Path, monkeypatch):
+    state_path = tmp_path / "state.json"
+    s = State.load(state_path)
+
+    ev = {"id": "L1", "provider": "nws", "updated": "2025-03-03T03:03:03Z"}
+    s.append_events([ev])
+    assert not state_path.exists()  # only the log was written
+    assert s.log_path.exists()
+
+    # Reload replays the log
+    s2 = State.load(state_path)
+    assert not s2.is_new(ev)
+    assert s2.providers["nws"].last_updated == "2025-03-03T03:03:03Z"
+
+    # Past the size limit, the log is folded into state.json
+    monkeypatch.setattr("disaster_alerts.state.LOG_COMPACT_BYTES", 0)
+    s2.append_events([{"id": "L2", "provider": "nws"}])
+    assert state_path.exists() and not s2.log_path.exists()
+    ids = list(State.load(state_path).providers["nws"].ids)
+    assert ids == ["L2", "L1"]
+
+
+def test_append_events_after_torn_line(tmp_path: Path):
+    state_path = tmp_path / "state.json"
+    s = State.load(state_path)
+    s.log_path.write_bytes(b'{"provider": "nws", "id": "A"')  # interrupted append
+
+    s.append_events([{"id": "B", "provider": "nws"}])
+
+    s2 = State.load(state_path)
+    assert not s2.is_new({"id": "B", "provider": "nws"})
+    assert s2.is_new({"id": "A", "provider": "nws"})
+
+
+def test_compact_without_pending_log_is_noop(tmp_path: Path):
+    state_path = tmp_path / "state.json"
+    s = State.load(state_path)
+    s.compact()
+    assert not state_path.exists()
+
+    s.append_events([{"id": "C1", "provider": "usgs"}])
+    s.compact()
+    assert state_path.exists() and not s.log_path.exists()
+    assert not State.load(state_path).is_new({"id": "C1", "provider": "usgs"})